@@ -1,20 +1,1026 @@
-import customtkinter as ctk
-import tkinter as tk
-from tkinter import messagebox
+import argparse
+import atexit
+import collections
+import contextlib
+import csv
+import fractions
+import functools
 import math
-import pygame
 import time
-from PIL import Image, ImageTk, ImageDraw
-import numpy as np
 import os
+import sys
 import re
-import numpy as np
-import sounddevice as sd
-from sympy import false
+import tempfile
+import hashlib
+import importlib
+import json
+import keyword
+import pickle
+import queue
+import threading
+import types
+import wave
+import weakref
+import tkinter as tk
+from tkinter import messagebox
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class StartupProfile:
+    """Where launch time goes, by import and initialization phase"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = []  # (seconds since start, seconds taken, depth, name)
+        self.local = threading.local()  # Nesting depth, per thread
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Time the body as a phase, nested under any phase already running on this thread"""
+        depth = getattr(self.local, "depth", 0)
+        self.local.depth = depth + 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.local.depth = depth
+            self.phases.append((start - self.start, time.perf_counter() - start, depth, name))
+
+    def report(self):
+        """The phases so far in the order they started, as text"""
+        lines = [f"{'at ms':>8s} {'took ms':>8s}  phase"]
+        for start, taken, depth, name in sorted(self.phases):
+            lines.append(f"{start * 1000:8.1f} {taken * 1000:8.1f}  {'  ' * depth}{name}")
+        lines.append(f"{(time.perf_counter() - self.start) * 1000:8.1f} {'':8s}  ready")
+
+        deferred = [module.name for module in LazyModule.modules if module.module is None]
+        if deferred:
+            lines.append("Not imported yet: " + ", ".join(deferred))
+        return "\n".join(lines)
+
+
+# Launch timings, reported with --startup-profile
+STARTUP = StartupProfile()
+
+
+class LazyModule:
+    """A module that is only imported when one of its attributes is first used"""
+
+    modules = []  # Every lazy module, for the startup report
+
+    def __init__(self, name):
+        self.name = name
+        self.module = None
+        LazyModule.modules.append(self)
+
+    def __getattr__(self, attribute):
+        # Only reached for the module's attributes, not name and module
+        if self.module is None:
+            with STARTUP.phase(f"import {self.name}"):
+                self.module = importlib.import_module(self.name)
+        return getattr(self.module, attribute)
+
+
+# numpy is needed by nearly everything, the rest waits for the subsystem that uses it
+with STARTUP.phase("import numpy"):
+    import numpy as np
+ctk = LazyModule("customtkinter")
+pygame = LazyModule("pygame")
+sd = LazyModule("sounddevice")
+sympy = LazyModule("sympy")
+sympy_parser = LazyModule("sympy.parsing.sympy_parser")
+Image = LazyModule("PIL.Image")
+ImageDraw = LazyModule("PIL.ImageDraw")
+ImageColor = LazyModule("PIL.ImageColor")
+ImageFont = LazyModule("PIL.ImageFont")
+multiprocessing = LazyModule("multiprocessing")
+shared_memory = LazyModule("multiprocessing.shared_memory")
+
+# Format every clip is decoded to and the audio engine runs at
+SAMPLE_RATE = 44100
+CHANNELS = 2
+
+# Clips ship next to the script, and their decoded copies are kept there too
+SOUND_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(SOUND_DIR, ".stembeats_cache")
+# Formulas and the visualizations they unlock
+FORMULAS_FILE = os.path.join(SOUND_DIR, "formulas.json")
+
+def sound_to_pcm(sound):
+    """Convert a pygame Sound to a (frames, channels) float32 array"""
+    pcm = pygame.sndarray.array(sound).astype(np.float32) / 32768
+    if pcm.ndim == 1:
+        pcm = pcm.reshape(-1, 1)
+    return pcm
+
+
+def decode_sound(sound_file):
+    """Decode an audio file to float32 PCM at the engine's format"""
+    # pygame is only used as a decoder, so it must not hold the output device
+    if not pygame.mixer.get_init():
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+        pygame.mixer.init(frequency=SAMPLE_RATE, channels=CHANNELS)
+
+    pcm = sound_to_pcm(pygame.mixer.Sound(sound_file))
+    if len(pcm) == 0:
+        raise ValueError("file contains no audio")
+    return pcm
+
+
+class SampleCache:
+    """On-disk cache of decoded clips.
+
+    Each clip is decoded once to float32 PCM and saved as a .npy file named
+    after a hash of its contents. Later launches memory-map that file, so
+    nothing is decoded and the engine mixes straight from the mapped pages.
+    An index keyed by path, mtime and size lets us skip rehashing clips that
+    haven't been touched. If the directory can't be written, as on a
+    read-only install, clips are decoded into memory each launch instead.
+    """
+
+    def __init__(self, directory=CACHE_DIR):
+        self.directory = directory
+        self.index_path = os.path.join(directory, "index.json")
+        try:
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+        self.writable = True  # Until a write fails
+
+    def load(self, sound_file):
+        """Return the clip as a read-only (frames, channels) float32 array"""
+        path = os.path.join(SOUND_DIR, sound_file)
+        stat = os.stat(path)
+        entry = self.index.get(path)
+        if entry and entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            digest = entry["hash"]
+        else:
+            digest = self.hash_file(path)
+
+        cache_file = self.cache_path(sound_file, digest)
+        if not os.path.exists(cache_file):
+            pcm = decode_sound(path)
+            if not self.writable:
+                return pcm
+            try:
+                self.store(sound_file, digest, pcm)
+            except OSError as e:
+                print(f"Warning: Could not write the sound cache, decoding clips in memory ({e})")
+                self.writable = False
+                return pcm
+
+        new_entry = {"mtime": stat.st_mtime_ns, "size": stat.st_size, "hash": digest}
+        if entry != new_entry and self.writable:
+            self.index[path] = new_entry
+            try:
+                self.save_index()
+            except OSError as e:
+                print(f"Warning: Could not write the sound cache index ({e})")
+                self.writable = False
+
+        return np.load(cache_file, mmap_mode="r")
+
+    def cache_path(self, sound_file, digest):
+        name = os.path.splitext(os.path.basename(sound_file))[0]
+        return os.path.join(self.directory, f"{name}-{digest}-{SAMPLE_RATE}x{CHANNELS}.npy")
+
+    def store(self, sound_file, digest, pcm):
+        """Write pcm atomically and drop stale versions of the same clip.
+
+        Other processes may be storing the same clip at once, so each
+        writes its own temporary file and a version another has just
+        removed is not an error.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        cache_file = self.cache_path(sound_file, digest)
+        name = os.path.splitext(os.path.basename(sound_file))[0]
+        for old in os.listdir(self.directory):
+            if old.startswith(name + "-") and old.endswith(".npy") and old != os.path.basename(cache_file):
+                try:
+                    os.remove(os.path.join(self.directory, old))
+                except FileNotFoundError:
+                    pass
+
+        self.replace(cache_file, lambda f: np.save(f, pcm), "wb")
+
+    def save_index(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.replace(self.index_path, lambda f: json.dump(self.index, f), "w")
+
+    def replace(self, path, write, mode):
+        """Atomically replace path with what write puts in a file opened with mode"""
+        fd, tmp_file = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        try:
+            with os.fdopen(fd, mode) as f:
+                write(f)
+            os.replace(tmp_file, path)
+        except BaseException:
+            os.remove(tmp_file)
+            raise
+
+    @staticmethod
+    def hash_file(path):
+        with open(path, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()[:16]
+
+
+class SampleLoader:
+    """Loads clips on a background thread the first time they're asked for.
+
+    Nothing is decoded or mapped at startup, so launch time doesn't grow
+    with the sample library. Loaded clips land in the shared sounds dict;
+    a clip that hasn't arrived yet is simply not played.
+    """
+
+    def __init__(self, cache, sounds):
+        self.cache = cache
+        self.sounds = sounds
+        self.requested = set()
+        self.pending = queue.Queue()
+        self.thread = None
+
+    def request(self, *sound_files):
+        """Queue clips for loading, ignoring ones already requested"""
+        for sound_file in sound_files:
+            if sound_file and sound_file not in self.requested:
+                self.requested.add(sound_file)
+                self.pending.put(sound_file)
+
+        if self.thread is None and not self.pending.empty():
+            self.thread = threading.Thread(target=self.run, name="SampleLoader", daemon=True)
+            self.thread.start()
+
+    def run(self):
+        while True:
+            sound_file = self.pending.get()
+            try:
+                self.sounds[sound_file] = self.cache.load(sound_file)
+            except Exception as e:
+                print(f"Warning: Could not load {sound_file} sound file ({e})")
+                self.sounds[sound_file] = None
+
+
+class SineVoice:
+    """Phase-continuous sine oscillator with smooth parameter glides.
+
+    The phase is an accumulator wrapped to [0, 2π), so it never loses
+    precision however long the tone runs, and retuning only sets new
+    targets that frequency and amplitude glide to. All work happens in
+    buffers preallocated for the block's shape, so render() allocates no
+    sample memory, only a few array views.
+    """
+
+    def __init__(self, samplerate, blocksize=256, glide=0.05):
+        self.samplerate = samplerate
+        self.glide_frames = max(1, int(glide * samplerate))
+        self.phase = 0.0
+        self.frequency = 0.0
+        self.volume = 0.0
+        self.target_frequency = 0.0
+        self.target_volume = 0.0
+        self.allocate(blocksize)
+
+    def allocate(self, frames, channels=2):
+        self.steps = np.arange(1, frames + 1, dtype=np.float64)
+        self.ramp = self.steps / frames
+        self.buffer = np.empty(frames, dtype=np.float64)
+        self.gains = np.empty(frames, dtype=np.float64)
+        self.output = np.empty((frames, channels), dtype=np.float32)  # Same shape as the block, so adding needs no temporary
+
+    @property
+    def active(self):
+        return self.volume > 0 or self.target_volume > 0
+
+    def set(self, frequency=None, volume=None):
+        """Glide to a new frequency and/or volume"""
+        if frequency is not None:
+            # A silent oscillator jumps straight to the new pitch
+            if not self.active:
+                self.frequency = frequency
+            self.target_frequency = frequency
+        if volume is not None:
+            self.target_volume = volume
+
+    def render(self, outdata):
+        """Add the next len(outdata) samples to every channel of outdata"""
+        frames = len(outdata)
+        if outdata.shape != self.output.shape:
+            self.allocate(frames, outdata.shape[1])
+
+        phase = self.buffer
+        scale = 2 * np.pi / self.samplerate
+        if self.frequency == self.target_frequency and self.volume == self.target_volume:
+            # Steady tone: the phase just advances by a fixed step
+            np.multiply(self.steps, self.frequency * scale, out=phase)
+            phase += self.phase
+            self.phase = phase[-1] % (2 * np.pi)
+            np.sin(phase, out=phase)
+            phase *= self.volume
+            self.add(phase, outdata)
+            return
+
+        # Move a block's worth of the way towards the targets, snapping once close
+        step = min(1.0, frames / self.glide_frames)
+        end_frequency = self.frequency + (self.target_frequency - self.frequency) * step
+        end_volume = self.volume + (self.target_volume - self.volume) * step
+        if abs(end_frequency - self.target_frequency) < 1e-3:
+            end_frequency = self.target_frequency
+        if abs(end_volume - self.target_volume) < 1e-4:
+            end_volume = self.target_volume
+
+        # Per-sample phase increments, integrated onto the running phase
+        np.multiply(self.ramp, end_frequency - self.frequency, out=phase)
+        phase += self.frequency
+        phase *= scale
+        np.cumsum(phase, out=phase)
+        phase += self.phase
+        self.phase = phase[-1] % (2 * np.pi)
+
+        np.multiply(self.ramp, end_volume - self.volume, out=self.gains)
+        self.gains += self.volume
+        np.sin(phase, out=phase)
+        phase *= self.gains
+        self.add(phase, outdata)
+
+        self.frequency = end_frequency
+        self.volume = end_volume
+
+    def add(self, samples, outdata):
+        """Add samples to every channel of outdata"""
+        for channel in range(outdata.shape[1]):
+            self.output[:, channel] = samples
+        outdata += self.output
+
+
+class Resampler:
+    """Pitch-shifted copies of clips, made on demand and kept in a bounded LRU.
+
+    A clip played at rate r sounds r times higher and lasts 1/r as long.
+    Rates are quantized to whole cents, so repeated pitches share a copy
+    and only the first costs a resample. Resampling is windowed-sinc
+    interpolation from a polyphase table: each output sample weighs TAPS
+    input samples by the table row nearest its fractional position, and
+    whole chunks of output are gathered at once with NumPy. When raising
+    the pitch, the kernel's cutoff drops to 1/rate so it doesn't alias.
+    """
+
+    TAPS = 32
+    PHASES = 256  # Fractional positions in the table
+    CHUNK = 8192  # Output frames gathered at once, which bounds the temporary memory
+
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self.variants = collections.OrderedDict()  # (sound file, cents) -> pcm, least recently used first
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, sound_file, pcm, rate):
+        """pcm, the clip loaded from sound_file, played at rate"""
+        cents = int(round(1200 * math.log2(rate)))
+        if cents == 0:
+            return pcm
+
+        key = (sound_file, cents)
+        variant = self.variants.get(key)
+        if variant is not None:
+            self.variants.move_to_end(key)
+            self.hits += 1
+            return variant
+
+        self.misses += 1
+        variant = self.variants[key] = self.resample(pcm, 2 ** (cents / 1200))
+        if len(self.variants) > self.capacity:
+            self.variants.popitem(last=False)
+        return variant
+
+    @classmethod
+    @functools.lru_cache(maxsize=16)
+    def table(cls, cutoff):
+        """Hann-windowed sinc weights, a row of TAPS per fractional position from 0 to 1"""
+        half = cls.TAPS // 2
+        fractions = np.arange(cls.PHASES + 1) / cls.PHASES
+        distances = np.arange(1 - half, half + 1)[np.newaxis, :] - fractions[:, np.newaxis]
+        weights = np.sinc(cutoff * distances) * (0.5 + 0.5 * np.cos(np.pi * distances / half))
+        weights /= weights.sum(axis=1, keepdims=True)  # Unity gain at DC
+        return weights.astype(np.float32)
+
+    @classmethod
+    def resample(cls, pcm, rate):
+        """pcm played at rate, as a new (frames, channels) float32 array"""
+        table = cls.table(round(min(1.0, 1.0 / rate), 3))
+        half = cls.TAPS // 2
+        # Channel-major, so each channel's taps are gathered from contiguous memory
+        padded = np.pad(np.asarray(pcm, dtype=np.float32).T, ((0, 0), (half, half + 1)))
+        taps = np.arange(cls.TAPS)
+
+        output = np.empty((int(len(pcm) / rate), pcm.shape[1]), dtype=np.float32)
+        for begin in range(0, len(output), cls.CHUNK):
+            positions = np.arange(begin, min(begin + cls.CHUNK, len(output))) * rate
+            whole = positions.astype(np.int64)
+            weights = table[np.rint((positions - whole) * cls.PHASES).astype(np.int64)]
+            # The first tap is half - 1 samples before whole, which is whole + 1 in padded
+            indices = whole[:, np.newaxis] + 1 + taps
+            for channel, samples in enumerate(padded):
+                output[begin:begin + len(positions), channel] = np.einsum("nt,nt->n", weights, samples[indices])
+        return output
+
+
+class ControlRing:
+    """Single-producer, single-consumer ring of messages for the audio callback.
+
+    One thread puts messages, the callback drains them at the start of
+    each block. put only writes a slot and then advances write, get only
+    reads one and then advances read, and each index has a single writer,
+    so neither side takes a lock. Messages are built by the producer and
+    left in their slots until it reuses them, so the callback never
+    allocates or frees one. A full ring drops the message and counts it.
+    """
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.slots = [None] * capacity
+        self.write = 0  # Messages put, only advanced by the producer
+        self.read = 0  # Messages taken, only advanced by the consumer
+        self.dropped = 0
+
+    def put(self, message):
+        """Queue message, returns False if the ring was full"""
+        if self.write - self.read >= self.capacity:
+            self.dropped += 1
+            return False
+        self.slots[self.write % self.capacity] = message
+        self.write += 1
+        return True
+
+    def get(self):
+        """The oldest message, or None if there are none"""
+        if self.read == self.write:
+            return None
+        message = self.slots[self.read % self.capacity]
+        self.read += 1
+        return message
+
+
+class VoicePool:
+    """A fixed number of clip voices with preallocated state, and voice stealing.
+
+    At most polyphony voices sound at once. Starting another steals one,
+    either the oldest or the quietest, where a voice's loudness is guessed
+    from its gain and how much of its clip is left. A stolen voice fades
+    out over FADE frames in one of the spare slots instead of cutting off
+    with a click. Only when every spare slot is also fading is one cut
+    short. Mixing goes through a preallocated scratch block, so nothing
+    is allocated per voice.
+    """
+
+    FADE = 128  # Frames a stolen voice fades out over
+
+    def __init__(self, polyphony=32, steal="oldest", channels=2, blocksize=256):
+        if polyphony < 1:
+            raise ValueError(f"polyphony must be at least 1, not {polyphony}")
+        self.polyphony = polyphony
+        self.steal = steal
+        slots = polyphony * 2  # The spare half holds voices fading out
+        self.pcm = [None] * slots  # None for a free slot
+        self.onset = [0] * slots
+        self.gain = [0.0] * slots
+        self.release = [None] * slots  # Frame a stolen voice started fading at
+        self.fade = np.linspace(1, 0, self.FADE, dtype=np.float32)[:, np.newaxis]
+        self.scratch = np.empty((blocksize, channels), dtype=np.float32)
+
+        # Usage statistics
+        self.active = 0  # Voices sounding, not counting ones fading out
+        self.peak = 0
+        self.started = 0
+        self.stolen = 0
+        self.cut = 0
+
+    def start(self, pcm, onset, gain=1.0):
+        """Start pcm at frame onset, stealing a voice if all are busy"""
+        if self.active >= self.polyphony:
+            victim = self.victim(onset)
+            end = self.onset[victim] + len(self.pcm[victim])
+            if end > onset:
+                self.release[victim] = onset
+                self.stolen += 1
+            else:
+                # It ends before pcm starts, so it just plays out in a spare slot
+                self.release[victim] = end
+            self.active -= 1
+
+        slot = self.free_slot()
+        self.pcm[slot] = pcm
+        self.onset[slot] = onset
+        self.gain[slot] = gain
+        self.release[slot] = None
+        self.active += 1
+        self.started += 1
+        self.peak = max(self.peak, self.active)
+
+    def victim(self, frame):
+        """The sounding voice to steal at frame, one that has ended by then if there is one"""
+        victim = None
+        lowest = None
+        for i, pcm in enumerate(self.pcm):
+            if pcm is None or self.release[i] is not None:
+                continue
+            if self.onset[i] + len(pcm) <= frame:
+                return i
+            if self.steal == "quietest":
+                score = self.gain[i] * (1 - (frame - self.onset[i]) / len(pcm))
+            else:
+                score = self.onset[i]
+            if lowest is None or score < lowest:
+                victim, lowest = i, score
+        return victim
+
+    def free_slot(self):
+        """A free slot, cutting short the voice furthest into its fade if there is none"""
+        slot = None
+        for i, pcm in enumerate(self.pcm):
+            if pcm is None:
+                return i
+            if self.release[i] is not None and (slot is None or self.release[i] < self.release[slot]):
+                slot = i
+        self.cut += 1
+        return slot
+
+    def mix(self, outdata, start, end):
+        """Add every voice's part of the block from start to end into outdata"""
+        if len(self.scratch) < end - start:
+            self.scratch = np.empty((end - start, outdata.shape[1]), dtype=np.float32)
+
+        for i, pcm in enumerate(self.pcm):
+            if pcm is None:
+                continue
+            onset = self.onset[i]
+            release = self.release[i]
+            offset = max(onset - start, 0)  # Where the voice starts inside the block
+            position = max(start - onset, 0)  # How far into the sample we are
+            count = min(end - start - offset, len(pcm) - position)
+            if release is not None:
+                count = min(count, release + self.FADE - start - offset)
+
+            if count > 0:
+                chunk = self.scratch[:count]
+                np.multiply(pcm[position:position + count], self.gain[i], out=chunk)
+                if release is not None:
+                    # Frames before the release are untouched, the rest follow the fade
+                    faded = max(release - start - offset, 0)
+                    into = max(start + offset - release, 0)
+                    if count > faded:
+                        chunk[faded:] *= self.fade[into:into + count - faded]
+                outdata[offset:offset + count] += chunk
+
+            finished = position + count >= len(pcm)
+            if release is not None and start + offset + max(count, 0) >= release + self.FADE:
+                finished = True
+            if finished:
+                if release is None:
+                    self.active -= 1
+                self.pcm[i] = None
+                self.release[i] = None
+
+    def stats(self):
+        """Voice usage since the pool was made"""
+        return {"polyphony": self.polyphony, "active": self.active, "peak": self.peak,
+                "started": self.started, "stolen": self.stolen, "cut": self.cut}
+
+
+class AudioEngine:
+    """Software mixer that owns the only audio output stream.
+
+    Every sound in the app is a voice summed here in NumPy blocks: beat
+    loops, one-shot event hits and the wave visualization's sine tone.
+    Beats are placed by absolute sample position against the stream's own
+    frame counter instead of Tk timers, so a slow canvas frame can't delay
+    or drift them.
+
+    Clips play in a VoicePool of polyphony voices. Voices, loops and the
+    tone belong to the callback. The other methods
+    only send it messages through a ControlRing, which it applies at the
+    start of the next block, so they must all be called from one thread.
+    gain and bpm are plain numbers the callback reads once per block.
+    """
+
+    def __init__(self, samplerate=44100, channels=2, blocksize=256, polyphony=32, steal="oldest"):
+        self.samplerate = samplerate
+        self.channels = channels
+        self.blocksize = blocksize
+        self.frame = 0  # Frames rendered since the stream started
+        self.bpm = 100
+        self.gain = 0.5  # Master gain, follows the volume slider
+        self.loops = {}  # key -> [pcm, frame of the last onset, gain]
+        self.scheduled = []  # [pcm, onset frame, gain, tag] for every clip that hasn't started yet
+        self.voices = VoicePool(polyphony, steal, channels, blocksize)
+        self.tone = SineVoice(samplerate, blocksize)
+        self.controls = ControlRing()
+        self.stream = None
+        self.underruns = 0  # Blocks the stream reported it couldn't deliver in time
+        self.profiler = None  # Profiler recording callback timings, if any
+        self.monitor = None  # AudioMonitor recording levels, if any
+
+    def start(self):
+        """Open the output stream"""
+        try:
+            self.stream = sd.OutputStream(
+                samplerate=self.samplerate,
+                channels=self.channels,
+                blocksize=self.blocksize,
+                dtype="float32",
+                callback=self.callback
+            )
+            self.stream.start()
+        except Exception as e:
+            print(f"Warning: Could not open audio output ({e})")
+            self.stream = None
+
+    def stop(self):
+        """Close the output stream"""
+        if self.stream:
+            try:
+                self.stream.stop()
+                self.stream.close()
+            except:
+                pass
+            self.stream = None
+
+    def beat_frames(self):
+        """Length of one beat at the current tempo, in frames"""
+        return self.samplerate * 60.0 / self.bpm
+
+    def play(self, pcm, gain=1.0):
+        """Play pcm once, starting with the next block"""
+        self.schedule(pcm, self.frame, gain)
+
+    def schedule(self, pcm, frame, gain=1.0, tag=None):
+        """Play pcm once starting exactly at frame, or straight away if that has passed"""
+        self.controls.put(("voice", [pcm, frame, gain, tag]))
+
+    def cancel(self, tag):
+        """Drop scheduled voices with tag that haven't started yet"""
+        self.controls.put(("cancel", tag))
+
+    def start_loop(self, key, pcm, gain=1.0):
+        """Play pcm once per beat, starting with the next block"""
+        self.controls.put(("loop", key, [pcm, None, gain]))
+
+    def stop_loop(self, key):
+        """Stop scheduling a loop, letting its current hit ring out"""
+        self.controls.put(("unloop", key))
+
+    def start_tone(self, frequency, volume=0.5):
+        """Glide the sine tone to frequency, fading it in if it was silent"""
+        self.controls.put(("tone", frequency, volume))
+
+    def stop_tone(self):
+        """Fade the sine tone out"""
+        self.controls.put(("tone", None, 0.0))
+
+    def apply_controls(self, start):
+        """Apply the messages sent since the last block, on the callback thread"""
+        message = self.controls.get()
+        while message is not None:
+            kind = message[0]
+            if kind == "voice":
+                voice = message[1]
+                if voice[1] < start:
+                    voice[1] = start
+                self.scheduled.append(voice)
+            elif kind == "cancel":
+                for i in range(len(self.scheduled) - 1, -1, -1):
+                    if self.scheduled[i][3] == message[1]:
+                        del self.scheduled[i]
+            elif kind == "loop":
+                self.loops[message[1]] = message[2]
+            elif kind == "unloop":
+                self.loops.pop(message[1], None)
+            elif kind == "tone":
+                self.tone.set(message[1], message[2])
+            message = self.controls.get()
+
+    def callback(self, outdata, frames, time_info, status):
+        profiler = self.profiler if self.profiler is not None and self.profiler.enabled else None
+        if profiler:
+            began = time.perf_counter()
+        underrun = bool(status and status.output_underflow)
+        if underrun:
+            self.underruns += 1
+
+        start = self.frame
+        end = start + frames
+        outdata.fill(0)
+        self.apply_controls(start)
+
+        # Start every scheduled clip that begins inside this block
+        i = 0
+        while i < len(self.scheduled):
+            if self.scheduled[i][1] < end:
+                pcm, onset, gain, _ = self.scheduled.pop(i)
+                self.voices.start(pcm, onset, gain)
+            else:
+                i += 1
+
+        # And every beat; the tempo is read per beat so a change applies
+        # from the next onset on. A faster tempo can put that onset before
+        # this block, and then it plays straight away rather than clipped
+        beat = self.beat_frames()
+        for key, loop in self.loops.items():
+            onset = start if loop[1] is None else max(loop[1] + beat, start)
+            while onset < end:
+                self.voices.start(loop[0], int(round(onset)), loop[2])
+                loop[1] = onset
+                if profiler:
+                    profiler.loop_onset(key, (int(round(onset)) - onset) / self.samplerate)
+                onset += beat
+
+        self.voices.mix(outdata, start, end)
+
+        if self.tone.active:
+            self.tone.render(outdata)
+
+        outdata *= self.gain
+        self.frame = end
+        if self.monitor is not None:
+            self.monitor.update(outdata, self)
+        if profiler:
+            profiler.callback(time.perf_counter() - began, frames / self.samplerate, underrun)
+
+    def voice_stats(self):
+        """Voice usage of the pool, see VoicePool.stats"""
+        return self.voices.stats()
+
+
+class AudioMonitor:
+    """What the audio callback is doing, kept in a single float64 array.
+
+    Holds the frame counter, underrun count, voice usage, each channel's
+    peak level and a scope trace of the last SCOPE output samples. It also stands in for
+    the Profiler: callback timings go into a ring of RECORDS rows for
+    someone else to collect. AudioProcess puts the array in shared memory,
+    so the GUI can read all of this without asking the audio process.
+    """
+
+    SCOPE = 2048  # Samples of the first channel kept for the scope
+    RECORDS = 512  # Callback timings kept until collected
+    FRAME, UNDERRUNS, SCOPE_END, RECORDS_END = range(4)  # Header slots
+    VOICES = 4  # Slots for the VoicePool.stats values, in VOICE_STATS order
+    VOICE_STATS = ["polyphony", "active", "peak", "started", "stolen", "cut"]
+    PEAKS = VOICES + len(VOICE_STATS)  # Then a peak per channel
+
+    def __init__(self, channels, buffer=None):
+        self.channels = channels
+        self.enabled = True
+        self.array = np.ndarray(self.size(channels), dtype=np.float64, buffer=buffer)
+        header = self.PEAKS + channels
+        self.header = self.array[:header]
+        self.peaks = self.array[self.PEAKS:header]
+        self.trace = self.array[header:header + self.SCOPE]
+        self.records = self.array[header + self.SCOPE:].reshape(self.RECORDS, 3)  # callback s, block s, underrun
+        self.magnitudes = np.empty((0, channels), dtype=np.float32)
+
+    @classmethod
+    def size(cls, channels):
+        """Length of the array, in float64s"""
+        return cls.PEAKS + channels + cls.SCOPE + cls.RECORDS * 3
+
+    def update(self, outdata, engine):
+        """Record the engine's block that just finished"""
+        if self.magnitudes.shape != outdata.shape:
+            self.magnitudes = np.empty(outdata.shape, dtype=np.float32)
+        np.abs(outdata, out=self.magnitudes)
+        np.max(self.magnitudes, axis=0, out=self.peaks)
+
+        # The end of the block goes into the trace, wrapping around
+        end = int(self.header[self.SCOPE_END])
+        samples = outdata[-self.SCOPE:, 0]
+        position = end % self.SCOPE
+        first = min(len(samples), self.SCOPE - position)
+        self.trace[position:position + first] = samples[:first]
+        self.trace[:len(samples) - first] = samples[first:]
+
+        self.header[self.SCOPE_END] = end + len(samples)
+        voices = engine.voices
+        self.header[self.VOICES:self.PEAKS] = (voices.polyphony, voices.active, voices.peak,
+                                                voices.started, voices.stolen, voices.cut)
+        self.header[self.UNDERRUNS] = engine.underruns
+        self.header[self.FRAME] = engine.frame
+
+    # Profiler interface; onsets name their loop, which isn't worth sharing
+    def callback(self, seconds, block, underrun):
+        end = int(self.header[self.RECORDS_END])
+        self.records[end % self.RECORDS] = (seconds, block, underrun)
+        self.header[self.RECORDS_END] = end + 1
+
+    def loop_onset(self, loop, error):
+        pass
+
+    def voice_stats(self):
+        """The engine's VoicePool.stats as of the last block"""
+        return {name: int(value) for name, value in zip(self.VOICE_STATS, self.header[self.VOICES:self.PEAKS])}
+
+    def levels(self):
+        """Peak level of each channel in the last block"""
+        return self.peaks.copy()
+
+    def scope(self):
+        """The last SCOPE samples of the first channel, oldest first"""
+        return np.roll(self.trace, -int(self.header[self.SCOPE_END] % self.SCOPE))
+
+
+class AudioProcess:
+    """An AudioEngine in its own process, so a slow frame can't starve it of the GIL.
+
+    It has the engine's interface. Calls are sent to the process as
+    commands over a one-way pipe, which takes no locks on this side. Clips
+    that are memory-mapped from the sample cache are sent as their path,
+    so both processes map the same pages, and only other clips are copied.
+    The process's frame counter, underruns, levels and scope are read from
+    an AudioMonitor in shared memory. A relay thread collects its callback
+    timings into the profiler.
+    """
+
+    RELAY = 0.05  # Seconds between relaying callback timings
+    PCM_ARGUMENT = {"play": 0, "schedule": 0, "start_loop": 1}  # Which argument of a command is a clip
+
+    def __init__(self, samplerate=44100, channels=2, blocksize=256, polyphony=32, steal="oldest"):
+        if polyphony < 1:
+            raise ValueError(f"polyphony must be at least 1, not {polyphony}")  # Before the process fails on it
+        self.samplerate = samplerate
+        self.channels = channels
+        self.blocksize = blocksize
+        self.settings = {"gain": 0.5, "bpm": 100}
+        self.samples = {}  # id(pcm) -> number, for every live clip the process has been sent
+        self.next_sample = 0
+        self.profiler = None  # Profiler to relay callback timings to, if any
+        self.shared = shared_memory.SharedMemory(create=True, size=AudioMonitor.size(channels) * 8)
+        self.monitor = AudioMonitor(channels, self.shared.buf)
+        self.monitor.array.fill(0)
+        self.stopped = threading.Event()
+
+        # Forking a process that runs Tk isn't safe, so the engine starts afresh
+        receiver, self.connection = multiprocessing.Pipe(duplex=False)
+        self.process = multiprocessing.get_context("spawn").Process(
+            target=run_audio_process, name="AudioProcess", daemon=True,
+            args=(receiver, self.shared.name, samplerate, channels, blocksize, polyphony, steal))
+        self.relay_thread = threading.Thread(target=self.relay, name="AudioRelay", daemon=True)
+
+    def start(self):
+        """Start the process, which opens the output stream"""
+        self.process.start()
+        self.relay_thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Stop the process and release the shared memory"""
+        if self.stopped.is_set():
+            return
+        self.stopped.set()
+        self.connection.close()
+        self.process.join(1.0)
+        self.relay_thread.join()
+
+        # The monitor's arrays must be gone before the memory can be closed
+        self.monitor = None
+        self.shared.close()
+        self.shared.unlink()
+
+    def send(self, command, *args):
+        args = list(args)
+        if command in self.PCM_ARGUMENT:
+            index = self.PCM_ARGUMENT[command]
+            args[index] = self.sample(args[index])
+        try:
+            self.connection.send((command, *args))
+        except (OSError, ValueError):
+            pass  # Stopped
+
+    def sample(self, pcm):
+        """The number the process knows pcm by, sending it first if needed"""
+        number = self.samples.get(id(pcm))
+        if number is None:
+            number = self.samples[id(pcm)] = self.next_sample
+            self.next_sample += 1
+            self.connection.send(("sample", number, getattr(pcm, "filename", None) or np.asarray(pcm)))
+            # Resampled clips come and go, so the process lets go of each with it
+            weakref.finalize(pcm, self.forget, id(pcm), number)
+        return number
+
+    def forget(self, key, number):
+        """pcm with id key is gone, so its id may be reused"""
+        self.samples.pop(key, None)
+        self.send("forget", number)
+
+    @staticmethod
+    def key(key):
+        """Loop keys and tags are sent as their ids"""
+        return None if key is None else id(key)
+
+    @property
+    def frame(self):
+        return int(self.monitor.header[AudioMonitor.FRAME])
+
+    @property
+    def underruns(self):
+        return int(self.monitor.header[AudioMonitor.UNDERRUNS])
+
+    @property
+    def gain(self):
+        return self.settings["gain"]
+
+    @gain.setter
+    def gain(self, gain):
+        self.settings["gain"] = gain
+        self.send("set", "gain", gain)
+
+    @property
+    def bpm(self):
+        return self.settings["bpm"]
+
+    @bpm.setter
+    def bpm(self, bpm):
+        self.settings["bpm"] = bpm
+        self.send("set", "bpm", bpm)
+
+    def beat_frames(self):
+        return self.samplerate * 60.0 / self.bpm
+
+    def play(self, pcm, gain=1.0):
+        self.send("play", pcm, gain)
+
+    def schedule(self, pcm, frame, gain=1.0, tag=None):
+        self.send("schedule", pcm, frame, gain, self.key(tag))
+
+    def cancel(self, tag):
+        self.send("cancel", self.key(tag))
+
+    def start_loop(self, key, pcm, gain=1.0):
+        self.send("start_loop", self.key(key), pcm, gain)
+
+    def stop_loop(self, key):
+        self.send("stop_loop", self.key(key))
+
+    def start_tone(self, frequency, volume=0.5):
+        self.send("start_tone", frequency, volume)
+
+    def stop_tone(self):
+        self.send("stop_tone")
+
+    def voice_stats(self):
+        return self.monitor.voice_stats()
+
+    def levels(self):
+        return self.monitor.levels()
+
+    def scope(self):
+        return self.monitor.scope()
+
+    def relay(self):
+        """Pass the process's callback timings on to the profiler, as its callback thread would"""
+        relayed = 0
+        while not self.stopped.wait(self.RELAY):
+            monitor = self.monitor
+            end = int(monitor.header[AudioMonitor.RECORDS_END])
+            if self.profiler is not None and self.profiler.enabled:
+                for i in range(max(relayed, end - AudioMonitor.RECORDS), end):
+                    seconds, block, underrun = monitor.records[i % AudioMonitor.RECORDS]
+                    self.profiler.callback(seconds, block, bool(underrun))
+            relayed = end
+
+
+def run_audio_process(connection, shared_name, samplerate, channels, blocksize, polyphony, steal):
+    """AudioProcess's side: run an engine on the commands sent until the pipe closes"""
+    shared = shared_memory.SharedMemory(name=shared_name)
+    engine = AudioEngine(samplerate, channels, blocksize, polyphony, steal)
+    engine.monitor = engine.profiler = AudioMonitor(channels, shared.buf)
+    engine.start()
+
+    samples = {}  # Number -> clip
+    try:
+        while True:
+            command, *args = connection.recv()
+            if command == "sample":
+                number, pcm = args
+                samples[number] = np.load(pcm, mmap_mode="r") if isinstance(pcm, str) else pcm
+                continue
+            if command == "forget":
+                samples.pop(args[0], None)
+                continue
+            if command in AudioProcess.PCM_ARGUMENT:
+                index = AudioProcess.PCM_ARGUMENT[command]
+                args[index] = samples[args[index]]
+            if command == "set":
+                setattr(engine, *args)
+            else:
+                getattr(engine, command)(*args)
+    except (EOFError, OSError):
+        pass
+    finally:
+        engine.stop()
+        engine.monitor = engine.profiler = None
+        shared.close()
 
-# Set customtkinter appearance
-ctk.set_appearance_mode("dark")
-ctk.set_default_color_theme("blue")
 
 class SoundLoop:
     """Class to handle continuous sound playback"""
@@ -23,42 +1029,1012 @@ class SoundLoop:
         self.app = app
         self.sound_file = sound_file
         self.playing = False
-        self.after_id = None
 
     def start(self):
-        """Start playing the sound in a loop"""
+        """Start playing the sound once per beat"""
+        pcm = self.app.sounds.get(self.sound_file)
+        if pcm is None:
+            return
+
         self.playing = True
-        self.play_once()
+        self.app.audio.start_loop(self, pcm)
 
-    def play_once(self):
-        """Play the sound once and schedule the next playback"""
-        if not self.playing:
-            return
+    def stop(self):
+        """Stop the sound loop"""
+        self.playing = False
+        self.app.audio.stop_loop(self)
+
+
+class SimClock:
+    """Simulation time read from the wall clock.
+
+    Every frame evaluates the physics at the real time elapsed since the
+    visualization (re)started, so a slow or skipped frame can't slow the
+    simulation down; the next frame just shows where things are by then.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Restart simulation time from zero"""
+        self.start = time.perf_counter()
+
+    def now(self):
+        """Seconds of simulation time elapsed"""
+        return time.perf_counter() - self.start
+
+
+class LevelOfDetail:
+    """How much detail the visualizations draw, from 0 (least) to MAX.
+
+    Each frame's draw time is checked against the budget, the length of a
+    frame at the frame rate cap. A frame over budget drops a level straight
+    away and one over LIMIT drops to the least detail, so drawing degrades
+    before frames overrun. Detail comes back a level at a time after
+    RECOVER frames well within budget, unless that level was last seen
+    over budget; those remembered costs fade each time they hold it back,
+    so a busy spell doesn't keep detail down for good. for_size caps the
+    level for a canvas too small to show it.
+    """
+
+    MAX = 3
+    LIMIT = 50.0  # ms no frame's drawing should take
+    RECOVER = 60  # Frames well within budget before detail rises again
+    LAYOUT = 600 * 600  # Canvas area the visualizations are laid out for
+
+    def __init__(self, budget):
+        self.budget = min(budget, self.LIMIT)  # ms
+        self.level = self.MAX
+        self.calm = 0  # Frames well within budget in a row
+        self.costs = [0.0] * (self.MAX + 1)  # Last draw time seen at each level, ms
+
+    def update(self, cost):
+        """Adjust the level after a frame that took cost ms to draw"""
+        self.costs[self.level] = cost
+        if cost > self.LIMIT:
+            self.level = 0
+            self.calm = 0
+        elif cost > self.budget:
+            self.level = max(0, self.level - 1)
+            self.calm = 0
+        elif cost < self.budget * FrameScheduler.LOAD:
+            self.calm += 1
+            if self.calm >= self.RECOVER and self.level < self.MAX:
+                self.calm = 0
+                if self.costs[self.level + 1] > self.budget:
+                    self.costs[self.level + 1] *= 0.75
+                else:
+                    self.level += 1
+        else:
+            self.calm = 0
 
-            # Play the sound
-        if self.sound_file in self.app.sounds and self.app.sounds[self.sound_file]:
-            self.app.sounds[self.sound_file].play()
+    @classmethod
+    def for_size(cls, width, height):
+        """Most detail worth drawing on a width x height canvas"""
+        if width is None or height is None:
+            return cls.MAX
+        shown = min(width, 600) * min(height, 600) / cls.LAYOUT
+        return sum(shown >= share for share in (0.1, 0.25, 0.5))
 
-            # 🔥 Calculate delay based on tempo slider
-        try:
-            bpm = int(self.app.tempo_slider.get()) + 50  # Matches your `adjust_tempo()` logic
-            delay = int(60000 / bpm)  # Convert BPM to ms delay
-        except:
-            delay = 1000  # Fallback to 1 second
 
-            # Schedule the next loop
-        self.after_id = self.app.root.after(delay, self.play_once)
+class FrameScheduler:
+    """Runs the active visualization's frames at an adaptive rate.
+
+    The frame interval follows the measured draw cost so that drawing takes
+    at most LOAD of each frame: weak machines settle towards min_fps, fast
+    ones climb to the max_fps cap. Nothing runs while no visualization is
+    active or the window is minimized. The draw cost also steers detail, the
+    LevelOfDetail the visualizations draw at.
+    """
+
+    LOAD = 0.5  # Largest share of a frame spent drawing
+
+    def __init__(self, root, max_fps=60, min_fps=10):
+        self.root = root
+        self.max_fps = max_fps
+        self.min_fps = min_fps
+        self.interval = 1000 / max_fps  # ms between frame starts
+        self.cost = None  # Smoothed draw time, ms
+        self.fps = 0.0  # Smoothed achieved frame rate
+        self.skipped = 0  # Frames dropped because drawing overran the interval
+        self.detail = LevelOfDetail(1000 / max_fps)
+        self.draw = None
+        self.restart = False
+        self.after_id = None
+        self.last_start = None
+        self.visible = True
+
+        self.root.bind("<Unmap>", self.on_unmap, add="+")
+        self.root.bind("<Map>", self.on_map, add="+")
+
+    def start(self, draw):
+        """Make draw the active frame function; it's called with restart=True first"""
+        self.stop()
+        self.draw = draw
+        self.restart = True
+        self.schedule(0)
 
     def stop(self):
-        """Stop the sound loop"""
-        self.playing = False
-        if self.after_id:
-            self.app.root.after_cancel(self.after_id)
+        """Stop running frames"""
+        self.cancel()
+        self.draw = None
+        self.fps = 0.0
+
+    def schedule(self, delay):
+        if self.draw is not None and self.visible and self.after_id is None:
+            self.after_id = self.root.after(delay, self.run)
+
+    def cancel(self):
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
             self.after_id = None
+        self.last_start = None
+
+    def run(self):
+        self.after_id = None
+        start = time.perf_counter()
+        if self.last_start is not None:
+            rate = 1 / max(start - self.last_start, 1e-6)
+            self.fps = rate if not self.fps else 0.9 * self.fps + 0.1 * rate
+        self.last_start = start
+
+        restart, self.restart = self.restart, False
+        self.draw(restart=restart)
+
+        # Adapt the interval to the draw cost, within the FPS limits
+        cost = (time.perf_counter() - start) * 1000
+        self.cost = cost if self.cost is None else 0.9 * self.cost + 0.1 * cost
+        self.detail.update(cost)
+        target = min(max(1000 / self.max_fps, self.cost / self.LOAD), 1000 / self.min_fps)
+        self.interval += (target - self.interval) * 0.2
+
+        # The next frame is due one interval after this one started; if
+        # drawing overran that, skip ahead and go again straight away
+        delay = self.interval - cost
+        if delay < 1:
+            self.skipped += int(-delay // self.interval) + 1
+        self.schedule(max(1, int(round(delay))))
+
+    def on_unmap(self, event):
+        if event.widget is self.root:
+            self.visible = False
+            self.cancel()
+
+    def on_map(self, event):
+        if event.widget is self.root and not self.visible:
+            # The simulation and audio kept running while hidden, so the next
+            # frame carries on from now; EventScheduler drops the missed hits
+            self.visible = True
+            self.schedule(0)
+
+
+class EventScheduler:
+    """Hands a visualization's predicted hits to the audio engine ahead of time.
+
+    Hit times come from the Visual's sound_events and are queued at their
+    exact frame a little before they are due, so they land sample-accurately
+    whatever the frame rate. Each frame only has to top the queue up. Clips
+    are pitched to the Visual's pitch through the app's Resampler.
+    """
+
+    LOOKAHEAD = 0.5  # Seconds of hits kept queued
+
+    def __init__(self, app):
+        self.app = app
+        self.visual = None
+        self.origin = 0  # Engine frame of the visualization's t = 0
+        self.scheduled_until = 0.0
+
+    def start(self, visual):
+        """Restart the timeline for a Visual, from now"""
+        self.stop()
+        self.visual = visual
+        self.origin = self.app.audio.frame
+        self.scheduled_until = 0.0
+        self.update()
+
+    def stop(self):
+        """Forget the timeline and any hits not yet sounding"""
+        self.app.audio.cancel(self)
+        self.visual = None
+
+    def update(self):
+        """Queue the hits due within the lookahead window"""
+        if self.visual is None:
+            return
+
+        audio = self.app.audio
+        now = (audio.frame - self.origin) / audio.samplerate
+        until = now + self.LOOKAHEAD
+        pitch = self.visual.pitch()
+        # Hits that came due while no frames ran are dropped, not all played at once
+        for t, sound_file in self.visual.sound_events(max(self.scheduled_until, now), until):
+            pcm = self.app.sounds.get(sound_file)
+            if pcm is not None:
+                pcm = self.app.resampler.get(sound_file, pcm, pitch)
+                audio.schedule(pcm, self.origin + int(round(t * audio.samplerate)), tag=self)
+        self.scheduled_until = until
+
+
+class Profiler:
+    """Frame and audio timings, for telling whether a stutter is drawing or sound.
+
+    While enabled it keeps the last HISTORY samples of each kind: every
+    frame's draw time and the canvas items it created, every audio
+    callback's run time and whether the stream reported an underrun, and
+    how far each beat-loop onset landed from its exact time. draw shows a
+    summary overlay and export writes the samples as CSV. Disabled, it
+    costs the audio callback and each frame one attribute check.
+    """
+
+    HISTORY = 2000
+    REFRESH = 0.25  # Seconds between overlay updates
+
+    def __init__(self):
+        self.enabled = False
+        self.frames = collections.deque(maxlen=self.HISTORY)  # (time, visual, draw ms, items created)
+        self.callbacks = collections.deque(maxlen=self.HISTORY)  # (time, callback ms, block ms, underrun)
+        self.onsets = collections.deque(maxlen=self.HISTORY)  # (time, loop, timing error ms)
+        self.voices = None  # Returns the audio engine's voice usage, if set
+        self.shown = 0.0  # When the overlay was last updated
+        self.lines = []
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.shown = 0.0
+
+    # The audio samples are appended from the callback thread; deque appends
+    # are atomic, so no lock is needed
+    def callback(self, seconds, block, underrun):
+        self.callbacks.append((time.perf_counter(), seconds * 1000, block * 1000, underrun))
+
+    def loop_onset(self, loop, error):
+        self.onsets.append((time.perf_counter(), getattr(loop, "sound_file", str(loop)), error * 1000))
+
+    def frame(self, visual, seconds, created):
+        self.frames.append((time.perf_counter(), visual, seconds * 1000, created))
+
+    def summary(self):
+        """Overlay lines summarizing the samples of the last few seconds"""
+        since = time.perf_counter() - 5.0
+        frames = [sample for sample in list(self.frames) if sample[0] >= since]
+        callbacks = [sample for sample in list(self.callbacks) if sample[0] >= since]
+        onsets = [sample for sample in list(self.onsets) if sample[0] >= since]
+
+        lines = ["profiler (F3 hide, F4 save CSV), last 5 s"]
+        if frames:
+            draw = np.array([sample[2] for sample in frames])
+            lines.append(f"frame  {draw.mean():6.2f} ms avg {draw.max():6.2f} max  "
+                         f"{len(frames) / 5:4.0f} fps  {sum(sample[3] for sample in frames)} items created")
+        if callbacks:
+            run = np.array([sample[1] for sample in callbacks])
+            lines.append(f"audio  {run.mean():6.3f} ms avg {run.max():6.3f} max  of {callbacks[-1][2]:.1f} ms blocks  "
+                         f"{sum(sample[3] for sample in callbacks)} underruns")
+        if onsets:
+            error = np.abs([sample[2] for sample in onsets])
+            lines.append(f"loops  {len(onsets)} onsets  {error.max():.3f} ms max timing error")
+        if self.voices is not None:
+            voices = self.voices()
+            lines.append(f"voices {voices['active']:3d}/{voices['polyphony']} now  {voices['peak']} peak  "
+                         f"{voices['started']} started  {voices['stolen']} stolen  {voices['cut']} cut")
+        return lines
+
+    def draw(self, scene):
+        """Show the overlay in the canvas's top left corner"""
+        now = time.perf_counter()
+        if now - self.shown >= self.REFRESH:
+            self.lines = self.summary()
+            self.shown = now
+
+        scene.rectangle(("profiler", "background"), 5, 5, 470, 12 + 16 * len(self.lines),
+                        fill="#000000", outline="#e74c3c", stipple="gray50")
+        for i, line in enumerate(self.lines):
+            scene.text(("profiler", i), 10, 10 + 16 * i, text=line, anchor="nw",
+                       fill="#e2e2e2", font=("Courier", 9))
+        for i in range(len(self.lines), 5):
+            scene.delete(("profiler", i))
+
+    def hide(self, scene):
+        scene.delete(("profiler", "background"))
+        for i in range(5):
+            scene.delete(("profiler", i))
+
+    def export(self, path):
+        """Write every sample kept as CSV: time, kind, name, ms, value.
+
+        value is the items created for a frame, 1 for an audio callback
+        that underran, and empty for a loop onset, whose ms is its timing
+        error.
+        """
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["time", "kind", "name", "ms", "value"])
+            rows = [(t, "frame", visual, ms, created) for t, visual, ms, created in list(self.frames)]
+            rows += [(t, "audio", "callback", ms, int(underrun)) for t, ms, _, underrun in list(self.callbacks)]
+            rows += [(t, "loop", loop, error, "") for t, loop, error in list(self.onsets)]
+            for t, kind, name, ms, value in sorted(rows, key=lambda row: row[0]):
+                writer.writerow([f"{t:.6f}", kind, name, f"{ms:.4f}", value])
+
+
+class Scene:
+    """Retained-mode layer over the canvas.
+
+    Items are addressed by a key and created the first time they are drawn.
+    Later frames only move or restyle them in place, so static titles and
+    labels cost nothing after the first frame of a visualization.
+
+    detail is the LevelOfDetail level to draw at, and width and height the
+    canvas's actual size once it is known.
+    """
+
+    def __init__(self, canvas, retained=True):
+        self.canvas = canvas
+        self.retained = retained  # False falls back to a full redraw each frame
+        self.owner = None
+        self.items = {}  # key -> [item id, coords, options]
+        self.created = 0  # Items created since the scene was made
+        self.detail = LevelOfDetail.MAX
+        self.width = None
+        self.height = None
+        self.canvas.bind("<Configure>", self.resize, add="+")
+
+    def resize(self, event):
+        self.width, self.height = event.width, event.height
+
+    def begin(self, owner):
+        """Start a frame for owner, returns True when the scene was rebuilt"""
+        if self.retained and owner == self.owner:
+            return False
+
+        self.clear()
+        self.owner = owner
+        return True
+
+    def clear(self):
+        """Remove every item from the canvas"""
+        self.canvas.delete("all")
+        self.items.clear()
+        self.owner = None
+
+    def draw(self, kind, key, *coords, **options):
+        """Create the item on first use, otherwise update it in place"""
+        if len(coords) == 1:
+            coords = coords[0]
+        coords = list(coords)
+
+        entry = self.items.get(key)
+        if entry is None:
+            item = getattr(self.canvas, "create_" + kind)(coords, **options)
+            self.items[key] = [item, coords, options]
+            self.created += 1
+            return item
+
+        item, old_coords, old_options = entry
+        if coords != old_coords:
+            self.canvas.coords(item, coords)
+            entry[1] = coords
+        if options != old_options:
+            changed = {name: value for name, value in options.items() if old_options.get(name) != value}
+            self.canvas.itemconfigure(item, **changed)
+            entry[2] = options
+        return item
+
+    def delete(self, key):
+        """Remove an item, if it has been drawn"""
+        entry = self.items.pop(key, None)
+        if entry is not None:
+            self.canvas.delete(entry[0])
+
+    def line(self, key, *coords, **options):
+        return self.draw("line", key, *coords, **options)
+
+    def oval(self, key, *coords, **options):
+        return self.draw("oval", key, *coords, **options)
+
+    def rectangle(self, key, *coords, **options):
+        return self.draw("rectangle", key, *coords, **options)
+
+    def polygon(self, key, *coords, **options):
+        return self.draw("polygon", key, *coords, **options)
+
+    def text(self, key, *coords, **options):
+        return self.draw("text", key, *coords, **options)
+
+
+
+class RasterCanvas:
+    """In-memory stand-in for the Tk canvas, drawn with PIL.
+
+    Implements the part of tk.Canvas a Scene uses, keeping the items as a
+    display list, so visualizations run without a display. image() draws
+    the current frame. Smoothed lines are drawn straight and dashes solid;
+    stippled fills are blended at the stipple's density.
+    """
+
+    STIPPLE = {"gray12": 0.125, "gray25": 0.25, "gray50": 0.5, "gray75": 0.75}
+    FONTS = {}  # Point size -> PIL font
+
+    def __init__(self, width=600, height=600, bg="#0f0c29"):
+        self.width = width
+        self.height = height
+        self.bg = bg
+        self.items = {}  # Item id -> [kind, coords, options], bottom first
+        self.next_id = 1
+
+    def create(self, kind, coords, options):
+        item = self.next_id
+        self.next_id += 1
+        self.items[item] = [kind, list(coords), dict(options)]
+        return item
+
+    def create_line(self, coords, **options):
+        return self.create("line", coords, options)
+
+    def create_oval(self, coords, **options):
+        return self.create("oval", coords, options)
+
+    def create_rectangle(self, coords, **options):
+        return self.create("rectangle", coords, options)
+
+    def create_polygon(self, coords, **options):
+        return self.create("polygon", coords, options)
+
+    def create_text(self, coords, **options):
+        return self.create("text", coords, options)
+
+    def coords(self, item, coords):
+        self.items[item][1] = list(coords)
+
+    def itemconfigure(self, item, **options):
+        self.items[item][2].update(options)
+
+    def delete(self, item):
+        if item == "all":
+            self.items.clear()
+        else:
+            self.items.pop(item, None)
+
+    def bind(self, sequence, func, add=None):
+        # The size never changes, so <Configure> fires once, straight away
+        if sequence == "<Configure>":
+            func(types.SimpleNamespace(widget=self, width=self.width, height=self.height))
+
+    def winfo_width(self):
+        return self.width
+
+    def winfo_height(self):
+        return self.height
+
+    @classmethod
+    def font(cls, font):
+        size = font[1] if isinstance(font, tuple) and len(font) > 1 else 12
+        if size not in cls.FONTS:
+            try:
+                cls.FONTS[size] = ImageFont.truetype("DejaVuSans.ttf", size)
+            except OSError:
+                cls.FONTS[size] = ImageFont.load_default(size)  # No Greek letters
+        return cls.FONTS[size]
+
+    @staticmethod
+    def anchor(anchor):
+        """PIL's text anchor for a Tk anchor such as nw or center"""
+        if anchor == "center":
+            return "mm"
+        horizontal = "l" if "w" in anchor else "r" if "e" in anchor else "m"
+        vertical = "t" if "n" in anchor else "b" if "s" in anchor else "m"
+        return horizontal + vertical
+
+    @staticmethod
+    def color(name):
+        """RGB for a Tk color, or None for an empty one"""
+        if not name:
+            return None
+        try:
+            return ImageColor.getrgb(name)
+        except ValueError:
+            return (128, 128, 128)  # Tk names PIL doesn't know
+
+    def fill(self, options, default):
+        """RGB(A) fill for an item's options, translucent if it is stippled"""
+        fill = self.color(options.get("fill", default))
+        density = self.STIPPLE.get(options.get("stipple"))
+        if fill is not None and density is not None:
+            fill = fill + (int(255 * density),)
+        return fill
+
+    def image(self):
+        """Draw the current items to a new RGB image"""
+        image = Image.new("RGB", (self.width, self.height), self.bg)
+        draw = ImageDraw.Draw(image, "RGBA")
+        for kind, coords, options in self.items.values():
+            points = list(zip(coords[0::2], coords[1::2]))
+            width = int(options.get("width", 1))
+            if kind == "line":
+                fill = self.color(options.get("fill", "black"))
+                if fill is None or len(points) < 2:
+                    continue
+                draw.line(points, fill=fill, width=width, joint="curve")
+                if options.get("arrow") == tk.LAST:
+                    self.arrowhead(draw, points[-2], points[-1], fill, width)
+            elif kind in ("oval", "rectangle"):
+                shape = draw.ellipse if kind == "oval" else draw.rectangle
+                x0, y0, x1, y1 = coords
+                shape((min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)),
+                      fill=self.fill(options, None),
+                      outline=self.color(options.get("outline", "black")), width=width)
+            elif kind == "polygon":
+                if len(points) < 3:
+                    continue
+                draw.polygon(points, fill=self.fill(options, "black"), outline=self.color(options.get("outline")))
+            elif kind == "text":
+                draw.text(points[0], options.get("text", ""), fill=self.color(options.get("fill", "black")),
+                          font=self.font(options.get("font")), anchor=self.anchor(options.get("anchor", "center")))
+        return image
+
+    @staticmethod
+    def arrowhead(draw, start, end, fill, width):
+        """Tk's default arrowhead, 10 px long, at end of the segment from start"""
+        dx, dy = end[0] - start[0], end[1] - start[1]
+        length = math.hypot(dx, dy)
+        if not length:
+            return
+        ux, uy = dx / length, dy / length
+        spread = 3 + width / 2
+        base = (end[0] - 10 * ux, end[1] - 10 * uy)
+        draw.polygon([end, (base[0] - spread * uy, base[1] + spread * ux),
+                      (base[0] + spread * uy, base[1] - spread * ux)], fill=fill)
+
+
+def snapshot(visual, time_passed, width=600, height=600):
+    """Draw one frame of a Visual, time_passed seconds in, to a PIL image"""
+    scene = Scene(RasterCanvas(width, height))
+    scene.begin(visual.name)
+    visual.draw(scene, time_passed)
+    return scene.canvas.image()
+
+
+def render(visual, output, duration=10.0, volume=0.5, **params):
+    """Render a visualization's sounds to a 16-bit WAV file, without the GUI.
+
+    visual is a visual id from formulas.json and params its parameters;
+    any it doesn't take are ignored. The hits come from its sound_events
+    and are mixed offline, so this runs far faster than real time.
+    """
+    visual = FormulaRegistry().make(visual, **params)
+    write_wav(output, visual.sound_events(0, duration), duration, volume, visual.tone(), visual.pitch())
+
+
+def write_wav(output, events, duration, volume=0.5, tone=None, pitch=1.0, clips=None):
+    """Mix (time, sound file) hits played at rate pitch, and a tone at frequency tone if given, to a WAV.
+
+    clips maps sound files to their PCM as recorded; clips not in it are
+    loaded.
+    """
+    cache = SampleCache()
+    resampler = Resampler()
+    clips = dict(clips or {})
+    for sound_file in {sound_file for _, sound_file in events}:
+        pcm = clips[sound_file] if sound_file in clips else cache.load(sound_file)
+        clips[sound_file] = resampler.get(sound_file, pcm, pitch)
+
+    frames = int(duration * SAMPLE_RATE)
+    mix = np.zeros((frames, CHANNELS), dtype=np.float32)
+    for t, sound_file in events:
+        start = int(round(t * SAMPLE_RATE))
+        pcm = clips[sound_file][:frames - start]
+        mix[start:start + len(pcm)] += pcm
+
+    # Some visualizations play a continuous tone instead of hits
+    if tone:
+        voice = SineVoice(SAMPLE_RATE, 1024)
+        voice.set(tone, 0.5)
+        for start in range(0, frames, 1024):
+            voice.render(mix[start:start + 1024])
+
+    mix *= volume
+    np.clip(mix, -1, 1, out=mix)
+    with wave.open(output, "wb") as f:
+        f.setnchannels(CHANNELS)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes((mix * 32767).astype("<i2").tobytes())
+
+
+def export_frames(visual, params, first, count, fps, size, directory=None):
+    """Draw frames first to first + count - 1 of a visualization.
+
+    Runs in an export worker. Frames are saved to directory as numbered
+    PNGs, or returned palettized for a GIF when directory is None.
+    """
+    visual = FormulaRegistry().make(visual, **params)
+    scene = Scene(RasterCanvas())
+    scene.begin(visual.name)
+    frames = []
+    for frame in range(first, first + count):
+        visual.draw(scene, frame / fps)
+        image = scene.canvas.image()
+        if size != image.width:
+            image = image.resize((size, size), Image.LANCZOS)
+        if directory is None:
+            frames.append(image.quantize(256, method=Image.Quantize.FASTOCTREE))
+        else:
+            image.save(os.path.join(directory, f"frame_{frame:05d}.png"))
+    return frames
+
+
+def export(visual, output, duration=5.0, fps=30, size=600, volume=0.5, pool=None, **params):
+    """Render a visualization's frames and sounds to files, without the GUI.
+
+    An output ending in .gif is written as an animated GIF, anything else
+    is a directory of numbered PNG frames. A WAV of the same name holds the
+    sounds, from render, so they line up with frame / fps. Frames are drawn
+    in chunks across pool, a ProcessPoolExecutor, or a new one. Returns the
+    WAV's path.
+    """
+    frames = int(round(duration * fps))
+    directory = None if output.lower().endswith(".gif") else output
+    if directory is not None:
+        os.makedirs(directory, exist_ok=True)
+
+    # Chunks of consecutive frames, so each worker's Scene only creates its
+    # items once, and a few per core to even out the load
+    chunk = max(8, math.ceil(frames / (4 * (os.cpu_count() or 1))))
+    own_pool = pool is None
+    if own_pool:
+        pool = ProcessPoolExecutor()
+    try:
+        futures = [pool.submit(export_frames, visual, params, first, min(chunk, frames - first), fps, size, directory)
+                   for first in range(0, frames, chunk)]
+        images = [image for future in futures for image in future.result()]
+    finally:
+        if own_pool:
+            pool.shutdown()
+
+    # GIF frame delays are whole hundredths of a second, so they are rounded
+    # from each frame's end time to keep the GIF in step with the WAV
+    if directory is None and images:
+        ends = [round((frame + 1) * 100 / fps) * 10 for frame in range(len(images))]
+        delays = [end - start for start, end in zip([0] + ends, ends)]
+        images[0].save(output, save_all=True, append_images=images[1:], duration=delays, loop=0)
+
+    wav = os.path.splitext(output.rstrip(os.sep))[0] + ".wav"
+    render(visual, wav, duration, volume, **params)
+    return wav
+
+
+def sweep(visual, duration=10.0, **grids):
+    """Work out a visualization's physics over a whole grid of parameters.
+
+    grids maps parameter names to sequences of values, and the result has
+    one axis per grid, in the order given; parameters not given keep their
+    defaults. Everything is computed at once with NumPy. Returns a dict of
+    arrays over the grid: each parameter, the visual's quantities, and for
+    visuals that make hits, "sounds", the clip each point hits with, and
+    "times", its hit times in [0, duration) along an extra last axis,
+    padded with NaN.
+    """
+    names = list(grids)
+    mesh = np.meshgrid(*[np.asarray(grids[name], dtype=float) for name in names], indexing="ij")
+    params = dict(zip(names, mesh))
+    shape = mesh[0].shape if mesh else ()
+
+    visual_class = FormulaRegistry().visual_class(visual)
+    result = dict(params)
+    for name, values in visual_class.quantities(**params).items():
+        result[name] = np.broadcast_to(values, shape)
+
+    hits = visual_class.hits(**params)
+    if hits is not None:
+        first, period, sounds = hits
+        first, period = np.broadcast_to(first, shape), np.broadcast_to(period, shape)
+        count = max(0, int(np.ceil(np.max((duration - first) / period, initial=0))))
+        times = first[..., None] + np.arange(count) * period[..., None]
+        times[times >= duration] = np.nan
+        result["times"] = times
+        result["sounds"] = np.broadcast_to(sounds, shape)
+    return result
+
+
+def render_sweep(result, directory, duration=10.0, volume=0.5, pool=None):
+    """Write a WAV per point of a sweep result, across pool or a new one.
+
+    Files are named by grid index, sweep_<i>_<j>.wav, and the list of paths
+    is returned in the grid's order. Clips are loaded here, once, so the
+    workers don't all decode them into the cache at the same time; each
+    worker pitches its own copy.
+    """
+    shape = next(iter(result.values())).shape  # The first parameter's
+    os.makedirs(directory, exist_ok=True)
+    cache = SampleCache()
+    loaded = {}  # Sound file -> PCM
+
+    own_pool = pool is None
+    if own_pool:
+        pool = ProcessPoolExecutor()
+    try:
+        futures = []
+        for index in np.ndindex(shape):
+            events = []
+            clips = {}
+            pitch = float(result["pitch"][index]) if "pitch" in result else 1.0
+            if "times" in result:
+                sound_file = str(result["sounds"][index])
+                events = [(t, sound_file) for t in result["times"][index] if not np.isnan(t)]
+                if sound_file not in loaded:
+                    loaded[sound_file] = cache.load(sound_file)
+                clips[sound_file] = loaded[sound_file]
+            tone = float(result["tone"][index]) if "tone" in result else None
+            output = os.path.join(directory, "sweep_" + "_".join(map(str, index)) + ".wav")
+            futures.append((output, pool.submit(write_wav, output, events, duration, volume, tone, pitch, clips)))
+        for output, future in futures:
+            future.result()
+    finally:
+        if own_pool:
+            pool.shutdown()
+    return [output for output, _ in futures]
+
+
+class FormulaIndex:
+    """Lookup table from normalized formula text to formula key.
+
+    Every formula and alias is normalized once when registered, so checking
+    an entry is a single normalization and a dict lookup however many
+    formulas are loaded.
+    """
+
+    WHITESPACE = re.compile(r'\s+')
+
+    def __init__(self, formulas=None, keys=None):
+        self.keys = dict(keys or {})  # Normalized text -> formula key
+        for key, info in (formulas or {}).items():
+            self.register(key, info)
+
+    @classmethod
+    def normalize(cls, text):
+        """Remove spaces and standardize case for comparison"""
+        return cls.WHITESPACE.sub('', text.lower())
+
+    def register(self, key, info):
+        """Add a formula and its aliases; earlier formulas win any clash"""
+        for text in [key] + info.get("aliases", []):
+            self.keys.setdefault(self.normalize(text), key)
+
+    def lookup(self, text):
+        """Return the formula key text matches, or None"""
+        return self.keys.get(self.normalize(text))
+
+
+
+class FormulaRegistry:
+    """The formulas in formulas.json and the visualizations they unlock.
+
+    Each formula names its visual id, a "module:Class" renderer under the
+    visuals package, its sounds, aliases and the ranges a click picks new
+    parameters from, as name: [low, high, decimals]; 0 decimals picks
+    whole numbers. Named presets give parameter sets to export. The
+    parsed table and its normalized lookup keys are
+    pickled to the cache directory and reused until the file changes, and
+    renderer modules are only imported when first shown.
+    """
+
+    def __init__(self, path=FORMULAS_FILE, directory=CACHE_DIR):
+        self.path = path
+        self.cache_path = os.path.join(directory, "formulas.pickle")
+        self.renderers = {}  # Renderer spec -> Visual class
+        data = self.load()
+        self.formulas = data["formulas"]
+        self.index = data["index"]
+        self.visuals = data["visuals"]
+
+    def load(self):
+        """The parsed formula table, from the cache if it is up to date"""
+        stat = os.stat(self.path)
+        source = [stat.st_mtime_ns, stat.st_size]
+        try:
+            with open(self.cache_path, "rb") as f:
+                data = pickle.load(f)
+            if data["source"] == source:
+                return data
+        except (OSError, pickle.UnpicklingError, EOFError, KeyError):
+            pass
+
+        with open(self.path, encoding="utf-8") as f:
+            formulas = json.load(f)
+        data = {"source": source, "formulas": formulas, "index": FormulaIndex(formulas).keys, "visuals": {}}
+        for key, info in formulas.items():
+            data["visuals"].setdefault(info["visual"], key)
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(self.cache_path, "wb") as f:
+                pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            pass  # Parsed again next time
+        return data
+
+    def register(self, key, info):
+        """Add a formula at runtime"""
+        self.formulas[key] = info
+        self.visuals.setdefault(info["visual"], key)
+
+    def renderer(self, formula):
+        """The Visual class drawing a formula, imported on first use"""
+        spec = self.formulas[formula]["renderer"]
+        if spec not in self.renderers:
+            module, name = spec.split(":")
+            self.renderers[spec] = getattr(importlib.import_module(module), name)
+        return self.renderers[spec]
+
+    def visual_class(self, visual):
+        """The Visual class for a visual id"""
+        return self.renderer(self.visuals[visual])
+
+    def params(self, visual):
+        """Names of the parameters a visual id takes"""
+        return list(self.formulas[self.visuals[visual]].get("params", {}))
+
+    def presets(self, visual):
+        """Named parameter sets for a visual id"""
+        return self.formulas[self.visuals[visual]].get("presets", {})
+
+    def make(self, visual, **params):
+        """A Visual for a visual id, ignoring any params it doesn't take"""
+        accepted = self.params(visual)
+        return self.visual_class(visual)(**{name: value for name, value in params.items() if name in accepted})
+
+    def random_params(self, formula):
+        """New parameters for a formula's visualization, within its ranges"""
+        params = {}
+        for name, (low, high, decimals) in self.formulas[formula].get("params", {}).items():
+            if decimals:
+                params[name] = round(np.random.uniform(low, high), decimals)
+            else:
+                params[name] = np.random.randint(low, high)
+        return params
+
+# How formula symbols may be typed, and what sympy should read instead
+FORMULA_SPELLINGS = [("π", " pi "), ("√", " sqrt"), ("²", "**2"), ("³", "**3"),
+                     ("ω", " omega "), ("φ", " phi "), ("×", "*"), ("·", "*")]
+
+
+# Entries are untrusted and parse_expr evaluates what it parses, so an entry
+# may only use what formulas are written with. Letters and digits outside
+# these names are read as products of single-letter symbols
+FORMULA_NAMES = ("sqrt", "sin", "cos", "pi", "omega", "phi")
+FORMULA_CHARACTERS = re.compile(r"[A-Za-z0-9\s+\-*/^()=.,]*")
+FORMULA_LENGTH = 80  # Characters, well past the longest formula
+# An exponent is a small number, a fraction of them or a symbol, and never itself raised to a power
+FORMULA_EXPONENT = re.compile(
+    r"(?:\*\*|\^)\s*(-?\d{1,2}(?:\.\d+)?|\(\s*-?\d{1,2}\s*(?:/\s*\d{1,2}\s*)?\)|[A-Za-z])(?![\w.]|\s*(?:\*\*|\^))")
+FORMULA_POWER = 1000  # Largest product of an entry's exponents, so powers of powers stay small
+
+
+def formula_allowed(text):
+    """Whether spelled-out entry text is safe to hand to parse_expr"""
+    if len(text) > FORMULA_LENGTH or not FORMULA_CHARACTERS.fullmatch(text):
+        return False
+    # Dots only in decimals, never attribute access
+    if re.search(r"\.(?!\d)", text):
+        return False
+    for name in re.findall(r"[A-Za-z]\w*", text):
+        if name not in FORMULA_NAMES and keyword.iskeyword(name):
+            return False
+
+    exponents = FORMULA_EXPONENT.findall(text)
+    if len(exponents) != len(re.findall(r"\*\*|\^", text)):
+        return False
+    power = 1
+    for exponent in exponents:
+        if not exponent.isalpha():
+            power *= abs(fractions.Fraction("".join(exponent.strip("()").split())))
+    return power <= FORMULA_POWER
+
+
+@functools.lru_cache(maxsize=None)
+def formula_context():
+    """The parser transformations, symbol table and names parse_formula uses, built on first use"""
+    transformations = sympy_parser.standard_transformations + (
+        sympy_parser.convert_xor, sympy_parser.rationalize, sympy_parser.implicit_multiplication_application)
+    # Letters sympy would otherwise read as constants or functions (I is the imaginary unit)
+    symbols = {name: sympy.Symbol(name) for name in "EINOQS"}
+    # Only the sympy names the transformations emit and formulas use, with no builtins
+    names = {"__builtins__": {}, "Symbol": sympy.Symbol, "Function": sympy.Function,
+             "Number": sympy.Number, "Integer": sympy.Integer, "Float": sympy.Float, "Rational": sympy.Rational,
+             "sqrt": sympy.sqrt, "sin": sympy.sin, "cos": sympy.cos, "pi": sympy.pi}
+    return transformations, symbols, names
+
+
+@functools.lru_cache(maxsize=512)
+def parse_formula(text):
+    """Parse "lhs = rhs" into the sympy expression lhs - rhs, or None if it can't be.
+
+    text should be normalized with SymbolicMatcher.normalize, which is also
+    what the cache is keyed by.
+    """
+    for typed, spelling in FORMULA_SPELLINGS:
+        text = text.replace(typed, spelling)
+    if text.count("=") != 1 or not formula_allowed(text):
+        return None
+
+    transformations, symbols, names = formula_context()
+    try:
+        lhs, rhs = [sympy_parser.parse_expr(side, local_dict=symbols, global_dict=names,
+                                            transformations=transformations)
+                    for side in text.split("=")]
+        # w is the usual stand-in for ω
+        return (lhs - rhs).subs(sympy.Symbol("w"), sympy.Symbol("omega"))
+    except Exception:
+        return None
+
+
+class SymbolicMatcher:
+    """Matches entries to formulas by symbolic equivalence.
+
+    An entry matches a formula when both parse to lhs - rhs expressions
+    that differ only by a constant factor, so "F = a*m", "ma = F" and
+    "V = R I" are all recognized. sympy can be slow, so matching runs on a
+    worker thread and callers poll the returned future, restarting the
+    worker if it takes too long.
+    """
+
+    TIMEOUT = 2.0  # Seconds before a match is given up on
+
+    def __init__(self, formulas):
+        self.formulas = formulas
+        self.forms = {}  # Formula key -> parsed expression, filled in as needed
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="SymbolicMatcher")
+
+    @staticmethod
+    def normalize(text):
+        """Collapse whitespace; case matters here, T and t are different symbols"""
+        return " ".join(text.split())
+
+    def submit(self, text):
+        """Start matching text, returns a future of the formula key or None"""
+        return self.executor.submit(self.match, text)
+
+    def restart(self):
+        """Leave the worker to a match that timed out and match on a fresh one.
+
+        Matches still queued behind it are cancelled.
+        """
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="SymbolicMatcher")
+
+    def warm_up(self):
+        """Import sympy and parse every formula on the worker, ahead of the first entry"""
+        return self.executor.submit(lambda: [self.form(key) for key in list(self.formulas)])
+
+    def form(self, key):
+        """A formula's parsed expression, parsed on first use"""
+        if key not in self.forms:
+            self.forms[key] = parse_formula(self.normalize(key))
+        return self.forms[key]
+
+    def match(self, text):
+        entered = parse_formula(self.normalize(text))
+        if entered is None:
+            return None
+
+        for key in list(self.formulas):
+            form = self.form(key)
+            if form is not None and self.equivalent(entered, form):
+                return key
+        return None
+
+    @staticmethod
+    def equivalent(entered, form):
+        if entered.free_symbols != form.free_symbols:
+            return False
+        try:
+            ratio = sympy.simplify(entered / form)
+        except Exception:
+            return False
+        return not ratio.free_symbols and ratio != 0
 
 
 class PhysicsApp:
-    def __init__(self, root):
+    def __init__(self, root, max_fps=60, profile=False, audio_process=False, polyphony=32, steal="oldest"):
         self.root = root
         self.root.title("StemBeats")
         self.root.geometry("1200x700")
@@ -66,89 +2042,75 @@ class PhysicsApp:
         # Configure dark blue-purple gradient background
         self.root.configure(fg_color=("#1a1a2e", "#4a148c"))
 
-        self._current_stream = None
-        self._current_phase = 0
-
-        # Initialize pygame for sound
-        pygame.mixer.init()
-
-        # Try to load sounds
-        self.sounds = {}
-        self.load_sounds()
-
-        # Define the formulas and their descriptions
-        self.formulas = {
-            "T = 2π√(L/g)": {
-                "name": "Pendulum Period",
-                "description": "Period of a simple pendulum",
-                "visual": "pendulum",
-                "sound": "piano.mp3",
-                "aliases": ["T = 2pi√(L/g)", "T = 2*pi*√(L/g)", "T = 2*π*√(L/g)"]
-            },
-            "t = √(2h/g)": {
-                "name": "Free Fall Time",
-                "description": "Time for an object to fall from height h",
-                "visual": "freefall",
-                "sound": "drum.mp3",
-                "aliases": ["t = sqrt(2h/g)", "t = √(2*h/g)"]
-            },
-            "F = ma": {
-                "name": "Newton's Second Law",
-                "description": "Force equals mass times acceleration",
-                "visual": "force",
-                "sound": None,
-                "aliases": []
-            },
-            "F = mv²/r": {
-                "name": "Centripetal Force",
-                "description": "Force needed for circular motion",
-                "visual": "orbit",
-                "sound": "snare.mp3",
-                "aliases": ["F = mv^2/r", "F = m*v²/r", "F = m*v^2/r"]
-            },
-            "V = IR": {
-                "name": "Ohm's Law",
-                "description": "Relationship between voltage, current and resistance",
-                "visual": "circuit",
-                "sound": None,
-                "aliases": ["V = I*R"]
-            },
-            "y = A sin(ωt + φ)": {
-                "name": "Simple Harmonic Motion",
-                "description": "Wave equation for simple harmonic motion",
-                "visual": "wave",
-                "sound": "synth.mp3",
-                "aliases": ["y = A*sin(ωt + φ)", "y = A sin(wt + φ)", "y = A*sin(wt + φ)"]
-            }
-        }
+        # Sounds are loaded in the background as formulas need them
+        with STARTUP.phase("sample loader"):
+            self.sounds = {}  # Sound file -> float32 PCM
+            self.sample_loader = SampleLoader(SampleCache(), self.sounds)
+            self.sample_loader.request("correct.mp3")
+            self.resampler = Resampler()  # Clips pitched for visuals like the pendulum
+
+        # Frame and audio timings, toggled with F3 and saved with F4
+        self.profiler = Profiler()
+        self.profiler.enabled = profile
+        self.root.bind("<F3>", lambda e: self.toggle_profiler())
+        self.root.bind("<F4>", lambda e: self.export_profile())
+
+        # Single mixer for every sound, optionally in a process of its own
+        with STARTUP.phase("audio engine"):
+            engine = AudioProcess if audio_process else AudioEngine
+            self.audio = engine(samplerate=SAMPLE_RATE, channels=CHANNELS, polyphony=polyphony, steal=steal)
+            self.audio.profiler = self.profiler
+            self.profiler.voices = self.audio.voice_stats
+            self.audio.start()
+
+        # Sound hits predicted from each visualization's physics
+        self.events = EventScheduler(self)
+
+        # Wall-clock simulation time shared by the visualizations, and the
+        # scheduler that runs their frames
+        self.clock = SimClock()
+        self.frames = FrameScheduler(root, max_fps=max_fps)
+
+        # Formulas and their visualizations, from formulas.json
+        with STARTUP.phase("formulas"):
+            self.registry = FormulaRegistry()
+            self.formulas = self.registry.formulas
+
+            # Normalized forms of every formula, for checking entries, and a
+            # symbolic fallback for entries written differently; sympy is
+            # imported by the fallback once the window is up
+            self.formula_index = FormulaIndex(keys=self.registry.index)
+            self.formula_matcher = SymbolicMatcher(self.formulas)
+            self.root.after_idle(self.formula_matcher.warm_up)
 
         # Keep track of entered formulas
         self.entered_formulas = []
 
         # Current animation
-        self.current_animation = None
+        self.current_formula = None
+        self.visual = None
         self.animation_running = False
-        self.animation_after_id = None
 
         # Sound playing states
         self.sound_states = {}  # Formula -> playing state
         self.sound_loops = {}  # Formula -> sound loop reference
 
         # Create UI components
-        self.create_ui()
+        with STARTUP.phase("create UI"):
+            self.create_ui()
 
-        # Start with no animation
-        self.draw_placeholder()
+            # Start with no animation
+            self.draw_placeholder()
 
-    def load_sounds(self):
-        """Load all sound files"""
-        sound_files = ["correct.mp3", "drum.mp3","piano_low.mp3", "piano_mid.mp3","piano_high.mp3", "snare.mp3", "synth.mp3"]
-        for sound_file in sound_files:
-            try:
-                self.sounds[sound_file] = pygame.mixer.Sound(sound_file)
-            except:
-                print(f"Warning: Could not load {sound_file} sound file")
-                self.sounds[sound_file] = None
+    def register_formula(self, formula, info):
+        """Add a formula at runtime so it can be discovered"""
+        self.registry.register(formula, info)
+        self.formula_index.register(formula, info)
+
+    def load_sounds(self, formula):
+        """Start loading the sound files a formula uses, if not already loaded"""
+        info = self.formulas[formula]
+        self.sample_loader.request(info.get("sound"), *info.get("samples", []))
 
     def create_ui(self):
         # Create main frames with gradient styling
@@ -163,6 +2125,9 @@ class PhysicsApp:
         self.canvas = tk.Canvas(self.visual_frame, bg="#0f0c29", width=600, height=600)
         self.canvas.pack(fill="both", expand=True, padx=10, pady=10)
 
+        # Retained-mode scene that all visualizations draw through
+        self.scene = Scene(self.canvas)
+
         # Right frame for formula entry and list with gradient styling
         self.formula_frame = ctk.CTkFrame(self.main_frame, fg_color=("gray90", "#1a1a2e"))
         self.formula_frame.pack(side="right", fill="both", expand=True, padx=5, pady=5)
@@ -299,21 +2264,22 @@ class PhysicsApp:
         volume = int(value)
         self.volume_value.configure(text=f"{volume}%")
 
-        # Set volume for all sounds (0.0 to 1.0)
-        for sound in self.sounds.values():
-            if sound:
-                sound.set_volume(volume / 100)
+        # Set the master gain of the mixer (0.0 to 1.0)
+        self.audio.gain = volume / 100
 
     def adjust_tempo(self, value):
         """Adjust the volume of all sounds"""
         tempo = int(value) + 50
         self.tempo_value.configure(text=f"{tempo}bpm")
+
+        # The engine picks the new tempo up at the next beat
+        self.audio.bpm = tempo
         return tempo
 
-    def play_sound(self, sound_file):
+    def play_sound(self, sound_file, gain=1.0):
         """Play a sound once"""
-        if sound_file in self.sounds and self.sounds[sound_file]:
-            self.sounds[sound_file].play()
+        if self.sounds.get(sound_file) is not None:
+            self.audio.play(self.sounds[sound_file], gain)
 
     def toggle_sound_loop(self, formula):
         """Toggle continuous sound loop for a formula"""
@@ -323,7 +2289,7 @@ class PhysicsApp:
 
         # Get the sound file for this formula
         sound_file = self.formulas[formula].get("sound")
-        if not sound_file or sound_file not in self.sounds or not self.sounds[sound_file]:
+        if not sound_file or self.sounds.get(sound_file) is None:
             return
 
         # Toggle the state
@@ -366,39 +2332,41 @@ class PhysicsApp:
             return
 
         # Check if formula matches any correct formula or its aliases
-        found_match = False
-        matched_formula = None
-
-        for correct_formula, info in self.formulas.items():
-            # Remove spaces and standardize for comparison
-            clean_input = re.sub(r'\s+', '', formula.lower())
-            clean_correct = re.sub(r'\s+', '', correct_formula.lower())
-
-            # Check direct match
-            if clean_input == clean_correct:
-                found_match = True
-                matched_formula = correct_formula
-                break
-
-            # Check aliases
-            for alias in info["aliases"]:
-                clean_alias = re.sub(r'\s+', '', alias.lower())
-                if clean_input == clean_alias:
-                    found_match = True
-                    matched_formula = correct_formula
-                    break
-
-            if found_match:
-                break
+        matched_formula = self.formula_index.lookup(formula)
+        if matched_formula is not None:
+            self.formula_checked(matched_formula)
+            return
+
+        # Otherwise look for an equivalent formula without blocking the UI
+        future = self.formula_matcher.submit(formula)
+        deadline = time.perf_counter() + self.formula_matcher.TIMEOUT
+        self.root.after(20, self.poll_formula_match, future, deadline)
+
+    def poll_formula_match(self, future, deadline):
+        """Wait for a symbolic match on the Tk loop, giving up after the timeout"""
+        if future.cancelled():
+            self.formula_checked(None)
+        elif future.done():
+            self.formula_checked(future.result())
+        elif time.perf_counter() > deadline:
+            # Later entries shouldn't wait on this one
+            self.formula_matcher.restart()
+            self.formula_checked(None)
+        else:
+            self.root.after(20, self.poll_formula_match, future, deadline)
+
+    def formula_checked(self, matched_formula):
+        """Act on the formula an entry matched, or None"""
+        found_match = matched_formula is not None
 
         # If a match was found and not already entered
         if found_match and matched_formula not in self.entered_formulas:
             self.entered_formulas.append(matched_formula)
+            self.load_sounds(matched_formula)
             self.add_formula_to_list(matched_formula)
 
             # Play correct sound
-            if "correct.mp3" in self.sounds and self.sounds["correct.mp3"]:
-                self.sounds["correct.mp3"].play()
+            self.play_sound("correct.mp3")
 
             # Start the corresponding visualization
             self.start_visualization(matched_formula)
@@ -496,852 +2464,286 @@ class PhysicsApp:
 
     def start_visualization(self, formula):
         # Stop any current animation
-        if self.animation_after_id:
-            self.root.after_cancel(self.animation_after_id)
-            self.animation_after_id = None
+        self.frames.stop()
 
-        # Stop any sine wave playing
+        # Stop any sine wave playing and pending hits
         self.stop_sine()
+        self.events.stop()
 
-        # Set the current animation
-        visual_type = self.formulas[formula]["visual"]
-        self.current_animation = visual_type
+        # Make sure the visualization's sounds are on their way
+        self.load_sounds(formula)
+
+        # Set the current animation, importing its renderer on first use
+        self.current_formula = formula
         self.animation_running = True
+        self.show_visual(self.registry.renderer(formula)())
 
-        # Start the animation
-        if visual_type == "pendulum":
-            self.animate_pendulum()
-        elif visual_type == "freefall":
-            self.animate_freefall()
-        elif visual_type == "force":
-            self.animate_force()
-        elif visual_type == "orbit":
-            self.animate_orbit()
-        elif visual_type == "circuit":
-            self.animate_circuit()
-        elif visual_type == "wave":
-            self.animate_wave()
+    def show_visual(self, visual):
+        """Run a Visual from its start"""
+        self.visual = visual
+        self.frames.start(self.animate)
 
     def draw_placeholder(self):
-        # Clear canvas
-        self.canvas.delete("all")
+        # Start a fresh scene
+        self.scene.begin("placeholder")
 
         # Draw a placeholder with gradient text
-        self.canvas.create_text(
+        self.scene.text("prompt",
             300, 250,
             text="Enter a physics formula to see visualization",
             fill="#e2e2e2",
             font=("Roboto", 16)
         )
 
-        self.canvas.create_text(
+        self.scene.text("hint",
             300, 300,
             text="Check the Help button for formula hints",
             fill="#9b59b6",
             font=("Roboto", 14)
         )
 
-    def animate_pendulum(self, angle=30, length=200, time_passed=0, last_extreme=False):
-        if not self.animation_running or self.current_animation != "pendulum":
+    def animate(self, restart=True):
+        """Draw a frame of the current visualization"""
+        if not self.animation_running or self.visual is None:
             return
 
-        # Clear canvas
-        self.canvas.delete("all")
-
-        # Draw title
-        self.canvas.create_text(
-            300, 30,
-            text="Pendulum Period: T = 2π√(L/g)",
-            fill="#e2e2e2",
-            font=("Roboto", 16, "bold")
-        )
-
-        # Constants
-        g = 9.8  # gravity
-
-        # Calculate period
-        period = 2 * math.pi * math.sqrt(length / 100 / g)
-
-        # Calculate current angle
-        amplitude = math.radians(angle)
-        omega = 2 * math.pi / period
-        current_angle = amplitude * math.sin(omega * time_passed)
-
-        # Calculate pendulum position
-        origin_x, origin_y = 300, 100
-        bob_x = origin_x + length * math.sin(current_angle)
-        bob_y = origin_y + length * math.cos(current_angle)
-
-        # Draw pendulum
-        self.canvas.create_line(origin_x, origin_y, bob_x, bob_y, fill="#9b59b6", width=3)
-        self.canvas.create_oval(bob_x - 15, bob_y - 15, bob_x + 15, bob_y + 15, fill="#e74c3c")
-
-        # Draw mount
-        self.canvas.create_rectangle(origin_x - 20, origin_y - 5, origin_x + 20, origin_y + 5, fill="#3498db")
-
-        # Draw time info
-        self.canvas.create_text(
-            300, 450,
-            text=f"Period: {period:.2f} seconds | Time: {time_passed:.2f} seconds",
-            fill="#e2e2e2",
-            font=("Roboto", 12)
-        )
-
-        # Draw length info
-        self.canvas.create_text(
-            300, 470,
-            text=f"Length: {length / 100:.2f} meters",
-            fill="#e2e2e2",
-            font=("Roboto", 12)
-        )
-
-        # Draw audio info
-        self.canvas.create_text(
-            300, 490,
-            text="Sound: Piano at extremes, background tone based on period",
-            fill="#9b59b6",
-            font=("Roboto", 12)
-        )
-
-        # Controls
-        self.canvas.create_text(
-            300, 520,
-            text="Click to change pendulum length",
-            fill="#9b59b6",
-            font=("Roboto", 12)
-        )
-
-        # Add click handler for changing length
-        self.canvas.bind("<Button-1>", lambda e: self.change_pendulum_length())
-
-        # Play sounds at extremes of swing
-        # Check if pendulum is at an extreme (left or right)
-        at_extreme = False
-        if abs(abs(current_angle) - amplitude) < 0.05:  # Close to amplitude
-            at_extreme = True
-
-        # Play piano sound at extremes
-        if at_extreme and not last_extreme:
-            length_meters = length / 100  # convert cm to meters
-
-            # Choose the appropriate sample
-            if length_meters < 1.6:
-                sample_name = "piano_high.mp3"
-            elif length_meters < 2.3:
-                sample_name = "piano_mid.mp3"
+        # Hits and tones follow from the physics; simulation time runs from
+        # the (re)start on the wall clock
+        if restart:
+            self.clock.reset()
+            self.events.start(self.visual)
+            tone = self.visual.tone()
+            if tone:
+                self.play_sine(tone)
             else:
-                sample_name = "piano_low.mp3"
+                self.stop_sine()
+        self.events.update()
 
-            # Play the sample if it's loaded
-            if sample_name in self.sounds:
-                self.sounds[sample_name].play()
+        # Start the frame; static items are only created on the first one
+        if self.scene.begin(self.visual.name):
+            self.canvas.bind("<Button-1>", lambda e: self.change_parameters())
 
-        # Update time and continue animation
-        self.animation_after_id = self.root.after(50, lambda: self.animate_pendulum(angle, length, time_passed + 0.05,
-                                                                                    at_extreme))
+        # Draw as much detail as the frame budget and canvas size allow
+        size_detail = LevelOfDetail.for_size(self.scene.width, self.scene.height)
+        self.scene.detail = min(self.frames.detail.level, size_detail)
 
-    def change_pendulum_length(self):
-        if self.current_animation == "pendulum":
-            # Generate random length between 100 and 300
-            new_length = np.random.randint(100, 300)
-
-            # Restart animation with new length
-            if self.animation_after_id:
-                self.root.after_cancel(self.animation_after_id)
-
-            self.animate_pendulum(angle=30, length=new_length, time_passed=0)
-
-    def animate_freefall(self, height=400, time_passed=0, was_at_bottom=False):
-        if not self.animation_running or self.current_animation != "freefall":
+        if not self.profiler.enabled:
+            self.visual.draw(self.scene, self.clock.now())
             return
 
-        # Clear canvas
-        self.canvas.delete("all")
-
-        # Draw title
-        self.canvas.create_text(
-            300, 30,
-            text="Free Fall Time: t = √(2h/g)",
-            fill="#e2e2e2",
-            font=("Roboto", 16, "bold")
-        )
-
-        # Constants
-        g = 9.8  # gravity
-
-        # Calculate total fall time
-        total_time = math.sqrt(2 * (height / 100) / g)
-
-        # Calculate cycle time (drop + reset)
-        cycle_time = total_time + 0.5  # Add 0.5s for reset animation
-
-        # Calculate current time in the cycle
-        cycle_position = time_passed % cycle_time
-
-        # Determine if in falling phase or reset phase
-        in_falling_phase = cycle_position <= total_time
-
-        # Calculate current position
-        initial_y = 80
-        max_y = initial_y + height
-
-        at_bottom = False
-        if in_falling_phase:
-            # Normal falling physics: y = y₀ + 0.5gt²
-            at_bottom = false
-            was_at_bottom = false
-            current_y = initial_y + 0.5 * g * (cycle_position ** 2) * 100
-            if current_y > max_y:
-                current_y = max_y
-        else:
-            current_y = initial_y
-            at_bottom = True
-
-        # Draw building/reference
-        self.canvas.create_rectangle(160, initial_y, 440, max_y, outline="#3498db")
-
-        # Draw ground
-        self.canvas.create_line(100, max_y, 500, max_y, fill="#2ecc71", width=3)
-
-        # Draw ball
-        self.canvas.create_oval(290 - 10, current_y - 10, 290 + 10, current_y + 10, fill="#e74c3c")
-
-        # Draw time info
-        self.canvas.create_text(
-            300, 500,
-            text=f"Fall time: {total_time:.2f} seconds | Current cycle: {cycle_position:.2f}/{cycle_time:.2f} seconds",
-            fill="#e2e2e2",
-            font=("Roboto", 12)
-        )
-
-        # Draw height info
-        self.canvas.create_text(
-            300, 520,
-            text=f"Height: {height / 100:.2f} meters",
-            fill="#e2e2e2",
-            font=("Roboto", 12)
-        )
-
-        # Draw audio info
-        self.canvas.create_text(
-            300, 540,
-            text="Sound: Drum when object hits ground",
-            fill="#9b59b6",
-            font=("Roboto", 12)
-        )
-
-        # Controls
-        self.canvas.create_text(
-            300, 570,
-            text="Click to change drop height",
-            fill="#9b59b6",
-            font=("Roboto", 12)
-        )
-
-        # Add click handler for changing height
-        self.canvas.bind("<Button-1>", lambda e: self.change_freefall_height())
-
-        # Check if ball just hit ground
-        just_hit = at_bottom and not was_at_bottom
-
-
-        # Play drum sound when ball hits ground
-        if just_hit and "drum.mp3" in self.sounds and self.sounds["drum.mp3"]:
-            self.sounds["drum.mp3"].play()
-            was_at_bottom = True
-
-        # Update time and continue animation
-        self.animation_after_id = self.root.after(50,lambda: self.animate_freefall(height, time_passed + 0.05, at_bottom))
-
-    def change_freefall_height(self):
-        if self.current_animation == "freefall":
-            # Generate random height between 200 and 400
-            new_height = np.random.randint(200, 400)
-
-            # Restart animation with new height
-            if self.animation_after_id:
-                self.root.after_cancel(self.animation_after_id)
-
-            self.animate_freefall(height=new_height, time_passed=0)
-
-    def animate_force(self, mass=2.0, force=10.0, time_passed=0):
-        if not self.animation_running or self.current_animation != "force":
+        began, created = time.perf_counter(), self.scene.created
+        self.visual.draw(self.scene, self.clock.now())
+        self.profiler.frame(self.visual.name, time.perf_counter() - began, self.scene.created - created)
+        self.profiler.draw(self.scene)
+
+    def toggle_profiler(self):
+        """Start or stop recording timings, with their overlay"""
+        self.profiler.toggle()
+        if not self.profiler.enabled:
+            self.profiler.hide(self.scene)
+
+    def export_profile(self):
+        """Save the recorded timings as CSV in the working directory"""
+        path = os.path.abspath(time.strftime("stembeats-profile-%Y%m%d-%H%M%S.csv"))
+        self.profiler.export(path)
+        messagebox.showinfo("Profile Saved", f"Timings saved to {path}")
+
+    def change_parameters(self):
+        """Restart the current visualization with random parameters"""
+        if self.visual is None:
             return
+        params = self.registry.random_params(self.current_formula)
+        self.show_visual(self.registry.renderer(self.current_formula)(**params))
 
-        # Clear canvas
-        self.canvas.delete("all")
-
-        # Draw title
-        self.canvas.create_text(
-            300, 30,
-            text="Newton's Second Law: F = ma",
-            fill="#e2e2e2",
-            font=("Roboto", 16, "bold")
-        )
-
-        # Calculate acceleration (a = F/m)
-        acceleration = force / mass
-
-        # Calculate cycle time - time until reset
-        cycle_time = 6.0  # seconds
-        cycle_position = time_passed % cycle_time
-
-        # Check if we're in reset phase
-        reset_phase = cycle_position > 5.0
-
-        # Calculate position
-        if not reset_phase:
-            # Normal motion: x = x₀ + 0.5at²
-            distance = 0.5 * acceleration * (cycle_position ** 2)
-            pos_x = 100 + min(distance * 10, 400)  # Scale and limit to canvas
+    def stop_sine(self):
+        self.audio.stop_tone()
+
+    def play_sine(self, frequency=440, volume=0.5):
+        self.audio.start_tone(frequency, volume)
+
+def write_sweep_csv(result, f):
+    """Write a sweep result as CSV, a row per grid point.
+
+    Rows hold the parameters, the quantities and how many hits the point
+    makes.
+    """
+    columns = [name for name in result if name not in ("times", "sounds")]
+    writer = csv.writer(f)
+    writer.writerow(columns + (["hits"] if "times" in result else []))
+    for index in np.ndindex(result[columns[0]].shape):
+        row = [f"{result[name][index]:g}" for name in columns]
+        if "times" in result:
+            row.append(np.count_nonzero(~np.isnan(result["times"][index])))
+        writer.writerow(row)
+
+
+def parse_positive(text):
+    """A finite number greater than 0"""
+    try:
+        value = float(text)
+    except ValueError:
+        value = 0.0
+    if not 0 < value < math.inf:
+        raise argparse.ArgumentTypeError(f"expected a number greater than 0, not {text!r}")
+    return value
+
+
+def parse_grid(text):
+    """A sweep grid from name=low:high:count or name=value,value,...
+
+    Every parameter is a physical quantity the physics divides by or takes
+    roots of, so values must be finite and greater than 0, as with the
+    render options.
+    """
+    name, _, values = text.partition("=")
+    try:
+        if ":" in values:
+            low, high, count = values.split(":")
+            values = np.linspace(float(low), float(high), int(count))
         else:
-            # Reset animation
-            reset_progress = (cycle_position - 5.0)
-            pos_x = max(100, 500 - reset_progress * 800)
-
-        # Draw ground
-        self.canvas.create_line(100, 350, 500, 350, fill="#2ecc71", width=3)
-
-        # Draw object
-        size = 30 + mass * 10  # Size based on mass
-        self.canvas.create_rectangle(
-            pos_x - size / 2, 350 - size,
-            pos_x + size / 2, 350,
-            fill="#3498db"
-        )
-
-        # Draw force arrow
-        arrow_length = force * 5
-        self.canvas.create_line(
-            pos_x, 350 - size / 2,
-                   pos_x + arrow_length, 350 - size / 2,
-            fill="#e74c3c", width=3, arrow=tk.LAST
-        )
-
-        # Draw physics info
-        self.canvas.create_text(
-            300, 400,
-            text=f"Mass: {mass} kg | Force: {force} N | Acceleration: {acceleration:.2f} m/s²",
-            fill="#e2e2e2",
-            font=("Roboto", 12)
-        )
-
-        # Draw time and distance
-        if not reset_phase:
-            self.canvas.create_text(
-                300, 430,
-                text=f"Time: {cycle_position:.2f} s | Distance: {distance:.2f} m",
-                fill="#e2e2e2",
-                font=("Roboto", 12)
-            )
+            values = np.array([float(value) for value in values.split(",")])
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected name=low:high:count or name=value,value,... not {text!r}")
+    if not len(values) or not np.all((values > 0) & np.isfinite(values)):
+        raise argparse.ArgumentTypeError(f"expected one or more values for {name}, all greater than 0, not {text!r}")
+    return name, values
+
+
+def parse_polyphony(text):
+    """A voice count, at least 1"""
+    try:
+        polyphony = int(text)
+    except ValueError:
+        polyphony = 0
+    if polyphony < 1:
+        raise argparse.ArgumentTypeError(f"expected a whole number of voices, at least 1, not {text!r}")
+    return polyphony
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="StemBeats: music meets physics")
+    parser.add_argument("--fps", type=int, default=60, help="frame rate cap for the visualizations")
+    parser.add_argument("--profile", action="store_true", help="start with the timing overlay on (F3 toggles it)")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="print where launch time went, by import and setup phase, once the window is up")
+    parser.add_argument("--audio-process", action="store_true",
+                        help="run the audio engine in its own process, so heavy frames can't cause underruns")
+    parser.add_argument("--polyphony", type=parse_polyphony, default=32, help="clips that can sound at once")
+    parser.add_argument("--steal", choices=["oldest", "quietest"], default="oldest",
+                        help="which sounding clip a new one replaces once all voices are busy")
+    commands = parser.add_subparsers(dest="command")
+
+    with STARTUP.phase("formulas"):
+        registry = FormulaRegistry()
+    visuals = list(registry.visuals)
+
+    # Options shared by the commands that render without the GUI
+    offline = argparse.ArgumentParser(add_help=False)
+    offline.add_argument("--volume", type=float, default=0.5, help="master gain, 0 to 1")
+    offline.add_argument("--length", type=parse_positive, help="pendulum length in cm")
+    offline.add_argument("--height", type=parse_positive, help="fall height in cm")
+    offline.add_argument("--mass", type=parse_positive, help="mass in kg")
+    offline.add_argument("--force", type=parse_positive, help="force in N")
+    offline.add_argument("--radius", type=parse_positive, help="orbit radius in cm")
+    offline.add_argument("--speed", type=parse_positive, help="orbit speed factor")
+    offline.add_argument("--amplitude", type=parse_positive, help="wave amplitude in pixels")
+    offline.add_argument("--frequency", type=parse_positive, help="wave frequency in Hz")
+
+    render_parser = commands.add_parser("render", parents=[offline], help="render a visualization's sounds to a WAV file")
+    render_parser.add_argument("visual", choices=visuals)
+    render_parser.add_argument("-o", "--output", help="WAV file to write (default: <visual>.wav)")
+    render_parser.add_argument("-d", "--duration", type=parse_positive, default=10.0, help="seconds of audio")
+
+    export_parser = commands.add_parser("export", parents=[offline],
+                                        help="export visualizations as GIFs or PNG frames, each with a WAV")
+    export_parser.add_argument("visual", nargs="+", choices=visuals + ["all"])
+    export_parser.add_argument("--preset", action="append",
+                               help="named parameters from formulas.json, or all; may be given more than once")
+    export_parser.add_argument("-o", "--output-dir", default=".", help="directory to write to")
+    export_parser.add_argument("-d", "--duration", type=parse_positive, default=5.0, help="seconds of each clip")
+    export_parser.add_argument("--fps", dest="frame_rate", type=int, default=30, help="frames per second")
+    export_parser.add_argument("--size", type=int, default=600, help="frame width and height in pixels")
+    export_parser.add_argument("--format", choices=["gif", "png"], default="gif",
+                               help="animated GIF, or a directory of PNG frames")
+    export_parser.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+
+    sweep_parser = commands.add_parser("sweep", help="tabulate a visualization's physics over a grid of parameters")
+    sweep_parser.add_argument("visual", choices=visuals)
+    sweep_parser.add_argument("grid", nargs="+", type=parse_grid,
+                              help="parameter values as name=low:high:count or name=value,value,...")
+    sweep_parser.add_argument("-o", "--output", help="CSV file to write (default: standard output)")
+    sweep_parser.add_argument("-d", "--duration", type=parse_positive, default=10.0, help="seconds of hits to count")
+    sweep_parser.add_argument("--wav-dir", help="also write a WAV per grid point to this directory")
+    sweep_parser.add_argument("--volume", type=float, default=0.5, help="master gain of the WAVs, 0 to 1")
+    sweep_parser.add_argument("--workers", type=int, help="worker processes for the WAVs (default: one per core)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "sweep":
+        grids = dict(args.grid)
+        unknown = set(grids) - set(registry.params(args.visual))
+        if unknown:
+            parser.error(f"{args.visual} takes {', '.join(registry.params(args.visual))}, not {', '.join(unknown)}")
+        result = sweep(args.visual, args.duration, **grids)
+
+        if args.output:
+            with open(args.output, "w", newline="") as f:
+                write_sweep_csv(result, f)
         else:
-            self.canvas.create_text(
-                300, 430,
-                text="Resetting position...",
-                fill="#e2e2e2",
-                font=("Roboto", 12)
-            )
-
-        # Controls
-        self.canvas.create_text(
-            300, 470,
-            text="Click to change force and mass",
-            fill="#9b59b6",
-            font=("Roboto", 12)
-        )
-
-        # Add click handler for changing force and mass
-        self.canvas.bind("<Button-1>", lambda e: self.change_force_mass())
-
-        # Update time and continue animation
-        self.animation_after_id = self.root.after(50, lambda: self.animate_force(mass, force, time_passed + 0.05))
-
-    def change_force_mass(self):
-        if self.current_animation == "force":
-            # Generate random mass and force
-            new_mass = round(np.random.uniform(1.0, 5.0), 1)
-            new_force = round(np.random.uniform(5.0, 20.0), 1)
-
-            # Restart animation with new parameters
-            if self.animation_after_id:
-                self.root.after_cancel(self.animation_after_id)
-
-            self.animate_force(mass=new_mass, force=new_force, time_passed=0)
-
-    def animate_orbit(self, radius=150, speed=1.0, time_passed=0, last_eigth=-1):
-        if not self.animation_running or self.current_animation != "orbit":
-            return
-
-        # Clear canvas
-        self.canvas.delete("all")
-
-        # Draw title
-        self.canvas.create_text(
-            300, 30,
-            text="Centripetal Force: F = mv²/r",
-            fill="#e2e2e2",
-            font=("Roboto", 16, "bold")
-        )
-
-        # Constants
-        center_x, center_y = 300, 250
-        mass = 1.0  # kg
-
-        # Calculate period of orbit (T = 2πr/v)
-        velocity = 50 * speed  # pixels per second
-        period = 2 * math.pi * radius / velocity
-
-        # Calculate current angle
-        angle = (time_passed % period) / period * 2 * math.pi
-
-        # Check if we just completed a cycle
-        eigth_index = int((time_passed % period) / (period / 8))
-        new_eigth = eigth_index != last_eigth
-
-        # Calculate object position
-        obj_x = center_x + radius * math.cos(angle)
-        obj_y = center_y + radius * math.sin(angle)
-
-        # Draw central object (sun/planet)
-        self.canvas.create_oval(center_x - 20, center_y - 20, center_x + 20, center_y + 20, fill="#f1c40f")
-
-        # Draw orbit path
-        self.canvas.create_oval(
-            center_x - radius, center_y - radius,
-            center_x + radius, center_y + radius,
-            outline="#3498db", dash=(2, 4)
-        )
-
-        # Draw orbiting object
-        self.canvas.create_oval(obj_x - 10, obj_y - 10, obj_x + 10, obj_y + 10, fill="#3498db")
-
-        # Calculate centripetal force (F = mv²/r)
-        force = mass * (velocity ** 2) / radius
-
-        # Draw force vector (pointing to center)
-        vector_length = min(30, force)
-        vector_angle = math.atan2(center_y - obj_y, center_x - obj_x)
-        vector_end_x = obj_x + vector_length * math.cos(vector_angle)
-        vector_end_y = obj_y + vector_length * math.sin(vector_angle)
-
-        self.canvas.create_line(
-            obj_x, obj_y, vector_end_x, vector_end_y,
-            fill="#e74c3c", width=2, arrow=tk.LAST
-        )
-
-        # Draw physics info
-        self.canvas.create_text(
-            300, 420,
-            text=f"Mass: {mass} kg | Velocity: {velocity:.1f} m/s | Radius: {radius / 100:.1f} m",
-            fill="#e2e2e2",
-            font=("Roboto", 12)
-        )
-
-        self.canvas.create_text(
-            300, 450,
-            text=f"Centripetal Force: {force:.2f} N | Period: {period:.2f} seconds",
-            fill="#e2e2e2",
-            font=("Roboto", 12)
-        )
-
-        # Draw audio info
-        self.canvas.create_text(
-            300, 480,
-            text="Sound: Snare beat on each orbit completion",
-            fill="#9b59b6",
-            font=("Roboto", 12)
-        )
-
-        # Controls
-        self.canvas.create_text(
-            300, 510,
-            text="Click to change orbit radius and speed",
-            fill="#9b59b6",
-            font=("Roboto", 12)
-        )
-
-        # Add click handler for changing orbit parameters
-        self.canvas.bind("<Button-1>", lambda e: self.change_orbit_parameters())
-
-        # Play snare sound when completing a cycle
-        if new_eigth and "snare.mp3" in self.sounds and self.sounds["snare.mp3"]:
-            self.sounds["snare.mp3"].play()
-
-        # Update time and continue animation
-        self.animation_after_id = self.root.after(
-            50, lambda: self.animate_orbit(radius, speed, time_passed + 0.05, eigth_index)
-        )
-
-    def change_orbit_parameters(self):
-        if self.current_animation == "orbit":
-            # Generate random radius and speed
-            new_radius = np.random.randint(80, 200)
-            new_speed = round(np.random.uniform(0.5, 2.0), 1)
-
-            # Restart animation with new parameters
-            if self.animation_after_id:
-                self.root.after_cancel(self.animation_after_id)
-
-            self.animate_orbit(radius=new_radius, speed=new_speed, time_passed=0)
-
-    def animate_circuit(self, voltage=10.0, resistance=5.0, time_passed=0):
-        if not self.animation_running or self.current_animation != "circuit":
-            return
-
-        # Clear canvas
-        self.canvas.delete("all")
-
-        # Draw title
-        self.canvas.create_text(
-            300, 30,
-            text="Ohm's Law: V = IR",
-            fill="#e2e2e2",
-            font=("Roboto", 16, "bold")
-        )
-
-        # Calculate current (I = V/R)
-        current = voltage / resistance
-
-        # Draw battery
-        battery_x, battery_y = 150, 250
-        battery_width, battery_height = 40, 80
-
-        # Battery body
-        self.canvas.create_rectangle(
-            battery_x - battery_width / 2, battery_y - battery_height / 2,
-            battery_x + battery_width / 2, battery_y + battery_height / 2,
-            fill="#3498db"
-        )
-
-        # Battery terminals
-        self.canvas.create_line(
-            battery_x, battery_y - battery_height / 2 - 10,
-            battery_x, battery_y - battery_height / 2,
-            fill="white", width=3
-        )
-        self.canvas.create_line(
-            battery_x - 10, battery_y + battery_height / 2,
-            battery_x + 10, battery_y + battery_height / 2,
-            fill="white", width=3
-        )
-
-        # Battery voltage label
-        self.canvas.create_text(
-            battery_x, battery_y,
-            text=f"{voltage}V",
-            fill="white",
-            font=("Roboto", 12, "bold")
-        )
-
-        # Draw resistor
-        resistor_x, resistor_y = 300, 150
-        resistor_width, resistor_height = 60, 30
-
-        self.canvas.create_rectangle(
-            resistor_x - resistor_width / 2, resistor_y - resistor_height / 2,
-            resistor_x + resistor_width / 2, resistor_y + resistor_height / 2,
-            fill="#9b59b6"
-        )
-
-        # Resistor value label
-        self.canvas.create_text(
-            resistor_x, resistor_y,
-            text=f"{resistance}Ω",
-            fill="white",
-            font=("Roboto", 12, "bold")
-        )
-
-        # Draw bulb/lamp
-        lamp_x, lamp_y = 450, 250
-        lamp_radius = 30
-
-        # Bulb brightness based on current (higher current = brighter)
-        brightness = min(255, int(current * 25))
-        lamp_color = f"#{brightness:02x}{brightness:02x}{brightness:02x}"
-
-        # Bulb body
-        self.canvas.create_oval(
-            lamp_x - lamp_radius, lamp_y - lamp_radius,
-            lamp_x + lamp_radius, lamp_y + lamp_radius,
-            fill=lamp_color, outline="white"
-        )
-
-        # Bulb filament
-        self.canvas.create_line(
-            lamp_x - lamp_radius / 2, lamp_y,
-            lamp_x + lamp_radius / 2, lamp_y,
-            fill="yellow" if brightness > 100 else "gray",
-            width=2
-        )
-
-        # Draw wires
-        # Top wire
-        self.canvas.create_line(
-            battery_x, battery_y - battery_height / 2,
-            battery_x, resistor_y,
-                       resistor_x - resistor_width / 2, resistor_y,
-            fill="#e2e2e2", width=2
-        )
-
-        # Middle wire
-        self.canvas.create_line(
-            resistor_x + resistor_width / 2, resistor_y,
-            lamp_x, resistor_y,
-            lamp_x, lamp_y - lamp_radius,
-            fill="#e2e2e2", width=2
-        )
-
-        # Bottom wire
-        self.canvas.create_line(
-            lamp_x, lamp_y + lamp_radius,
-            lamp_x, lamp_y + lamp_radius + 20,
-            battery_x, lamp_y + lamp_radius + 20,
-            battery_x, battery_y + battery_height / 2,
-            fill="#e2e2e2", width=2
-        )
-
-        # Draw current flow indicators (animated dots)
-        num_dots = 12
-        for i in range(num_dots):
-            # Calculate position in the circuit cycle
-            circuit_position = (time_passed + i / num_dots) % 1.0
-
-            # Determine dot position based on circuit position
-            dot_x, dot_y = 0, 0
-
-            if circuit_position < 0.25:  # Top wire
-                progress = circuit_position * 4
-                dot_x = battery_x + progress * (resistor_x - resistor_width / 2 - battery_x)
-                dot_y = resistor_y
-            elif circuit_position < 0.5:  # Middle wire
-                progress = (circuit_position - 0.25) * 4
-                dot_x = resistor_x + resistor_width / 2 + progress * (lamp_x - (resistor_x + resistor_width / 2))
-                dot_y = resistor_y
-            elif circuit_position < 0.75:  # Bottom wire (vertical part near lamp)
-                progress = (circuit_position - 0.5) * 4
-                dot_x = lamp_x
-                dot_y = lamp_y + lamp_radius + progress * 20
-            else:  # Bottom wire (horizontal and back to battery)
-                progress = (circuit_position - 0.75) * 4
-                dot_x = lamp_x - progress * (lamp_x - battery_x)
-                dot_y = lamp_y + lamp_radius + 20
-
-            # Draw dot with brightness proportional to current
-            dot_size = 3 + current / 3
-            dot_color = f"#{min(255, int(current * 25)):02x}ff{min(255, int(current * 25)):02x}"
-
-            self.canvas.create_oval(
-                dot_x - dot_size, dot_y - dot_size,
-                dot_x + dot_size, dot_y + dot_size,
-                fill=dot_color, outline=""
-            )
-
-        # Draw physics info
-        self.canvas.create_text(
-            300, 420,
-            text=f"Voltage: {voltage:.1f} V | Resistance: {resistance:.1f} Ω | Current: {current:.2f} A",
-            fill="#e2e2e2",
-            font=("Roboto", 12)
-        )
-
-        # Draw audio info
-        self.canvas.create_text(
-            300, 450,
-            text="No sound for this visualization",
-            fill="#9b59b6",
-            font=("Roboto", 12)
-        )
-
-        # Controls
-        self.canvas.create_text(
-            300, 480,
-            text="Click to change voltage and resistance",
-            fill="#9b59b6",
-            font=("Roboto", 12)
-        )
-
-        # Add click handler for changing circuit parameters
-        self.canvas.bind("<Button-1>", lambda e: self.change_circuit_parameters())
-
-        # Update time and continue animation
-        self.animation_after_id = self.root.after(
-            50, lambda: self.animate_circuit(voltage, resistance, time_passed + 0.02)
-        )
-
-    def change_circuit_parameters(self):
-        if self.current_animation == "circuit":
-            # Generate random voltage and resistance
-            new_voltage = round(np.random.uniform(5.0, 15.0), 1)
-            new_resistance = round(np.random.uniform(1.0, 10.0), 1)
-
-            # Restart animation with new parameters
-            if self.animation_after_id:
-                self.root.after_cancel(self.animation_after_id)
-
-            self.animate_circuit(voltage=new_voltage, resistance=new_resistance, time_passed=0)
-
-    def stop_sine(self):
-        if self._current_stream:
-            try:
-                self._current_stream.stop()
-                self._current_stream.close()
-            except:
-                pass
-            self._current_stream = None
-
-    def play_sine(self, frequency=440, volume=0.5, samplerate=44100):
-        self.stop_sine()
-
-        dt = 1 / samplerate
-        omega = 2 * np.pi * frequency
-
-        def callback(outdata, frames, time, status):
-            t_values = self._t + dt * np.arange(frames)
-            samples = np.sin(omega * t_values) * volume
-            outdata[:] = samples.reshape(-1, 1).astype(np.float32)
-            self._t = t_values[-1]
-
-        self._t = 0  # Reset time on new tone
-        stream = sd.OutputStream(
-            samplerate=samplerate,
-            channels=1,
-            callback=callback
-        )
-        stream.start()
-        self._current_stream = stream
-
-    def animate_wave(self, amplitude=50, frequency=1.0, time_passed=0):
-        if not self.animation_running or self.current_animation != "wave":
-            return
-
-        # Clear canvas
-        self.canvas.delete("all")
-
-        # Draw title
-        self.canvas.create_text(
-            300, 30,
-            text="Simple Harmonic Motion: y = A sin(ωt + φ)",
-            fill="#e2e2e2",
-            font=("Roboto", 16, "bold")
-        )
-
-        # Parameters
-        angular_frequency = frequency * 2 * math.pi  # ω = 2πf
-        phase = 0  # φ
-
-        # Draw axes
-        axis_y = 250
-        self.canvas.create_line(50, axis_y, 550, axis_y, fill="#3498db", width=1)  # x-axis
-        self.canvas.create_line(100, 100, 100, 400, fill="#3498db", width=1)  # y-axis
-
-        # Draw wave
-        points = []
-        for x in range(500):
-            x_pos = x + 100
-            t = time_passed + x / 100
-            y = axis_y - amplitude * math.sin(angular_frequency * t + phase)
-            points.append(x_pos)
-            points.append(y)
-
-        # Draw sine wave
-        if len(points) >= 4:  # Need at least 2 points (4 values) to draw a line
-            self.canvas.create_line(points, fill="#9b59b6", width=2, smooth=True)
-
-        # Create gradient for the wave
-        num_segments = 20
-        segment_width = 500 / num_segments
-        for i in range(num_segments):
-            segment_points = []
-            for j in range(int(segment_width) + 1):
-                x_pos = 100 + i * segment_width + j
-                x_val = i * segment_width + j
-                t = time_passed + x_val / 100
-                y1 = axis_y - amplitude * math.sin(angular_frequency * t + phase)
-                y2 = axis_y
-                segment_points.extend([x_pos, y1, x_pos, y2])
-
-            # Calculate color based on position (blue to purple gradient)
-            r = int(100 + (i / num_segments) * 155)
-            g = int(100 - (i / num_segments) * 100)
-            b = 255
-            color = f"#{r:02x}{g:02x}{b:02x}"
-
-            if len(segment_points) >= 4:
-                self.canvas.create_polygon(segment_points, fill=color, outline="", stipple="gray12")
-
-        # Draw a moving point on the wave
-        point_x = 100  # At the origin of the wave
-        point_y = axis_y - amplitude * math.sin(angular_frequency * time_passed + phase)
-        self.canvas.create_oval(
-            point_x - 8, point_y - 8,
-            point_x + 8, point_y + 8,
-            fill="#e74c3c", outline="white"
-        )
-
-        # Draw vertical line to show oscillation
-        self.canvas.create_line(
-            point_x, axis_y,
-            point_x, point_y,
-            fill="white", dash=(2, 2)
-        )
-
-        # Draw parameters
-        self.canvas.create_text(
-            300, 420,
-            text=f"Amplitude (A): {amplitude} pixels | Frequency (f): {frequency:.2f} Hz | Angular Frequency (ω): {angular_frequency:.2f} rad/s",
-            fill="#e2e2e2",
-            font=("Roboto", 12)
-        )
-
-        self.canvas.create_text(
-            300, 450,
-            text=f"Period (T): {1 / frequency:.2f} seconds | Time: {time_passed:.2f} seconds",
-            fill="#e2e2e2",
-            font=("Roboto", 12)
-        )
-
-        # Draw audio info
-        self.canvas.create_text(
-            300, 480,
-            text="Sound: Synth tones matching wave frequency (freq increased 300x)",
-            fill="#9b59b6",
-            font=("Roboto", 12)
-        )
-
-        # Controls
-        self.canvas.create_text(
-            300, 510,
-            text="Click to change amplitude and frequency",
-            fill="#9b59b6",
-            font=("Roboto", 12)
-        )
-
-        # Add click handler for changing wave parameters
-        self.canvas.bind("<Button-1>", lambda e: self.change_wave_parameters())
-
-        # Update time and continue animation
-        self.animation_after_id = self.root.after(
-            50, lambda: self.animate_wave(amplitude, frequency, time_passed + 0.05)
-        )
-
-    def change_wave_parameters(self):
-        if self.current_animation == "wave":
-            # Generate random amplitude and frequency
-            new_amplitude = np.random.randint(30, 70)
-            new_frequency = round(np.random.uniform(0.5, 2.0), 2)
-
-            # Restart animation with new parameters
-            if self.animation_after_id:
-                self.root.after_cancel(self.animation_after_id)
-                # Play sine wave at higher frequency (300x for audible range)
-                play_freq = int(new_frequency * 300)
-                self.play_sine(play_freq)
-
-            self.animate_wave(amplitude=new_amplitude, frequency=new_frequency, time_passed=0)
+            write_sweep_csv(result, sys.stdout)
+
+        if args.wav_dir:
+            with ProcessPoolExecutor(args.workers) as pool:
+                paths = render_sweep(result, args.wav_dir, args.duration, args.volume, pool)
+            print(f"Wrote {len(paths)} WAVs to {args.wav_dir}", file=sys.stderr)
+        return
+
+    if args.command in ("render", "export"):
+        names = ["length", "height", "mass", "force", "radius", "speed", "amplitude", "frequency"]
+        params = {name: getattr(args, name) for name in names if getattr(args, name) is not None}
+
+    if args.command == "render":
+        output = args.output or f"{args.visual}.wav"
+        render(args.visual, output, args.duration, args.volume, **params)
+        print(f"Wrote {output}")
+        return
+
+    if args.command == "export":
+        # One clip per visual and preset; options given on the command line
+        # override the presets'
+        clips = []
+        for visual in (visuals if "all" in args.visual else args.visual):
+            presets = registry.presets(visual)
+            if not args.preset:
+                clips.append((visual, visual, params))
+                continue
+            for name in (presets if "all" in args.preset else args.preset):
+                if name not in presets:
+                    parser.error(f"{visual} has no preset {name!r} (choose from {', '.join(presets)})")
+                clips.append((visual, f"{visual}-{name}", dict(presets[name], **params)))
+
+        os.makedirs(args.output_dir, exist_ok=True)
+        with ProcessPoolExecutor(args.workers) as pool:
+            for visual, name, clip_params in clips:
+                output = os.path.join(args.output_dir, name + (".gif" if args.format == "gif" else ""))
+                wav = export(visual, output, args.duration, args.frame_rate, args.size, args.volume,
+                             pool=pool, **clip_params)
+                print(f"Wrote {output} and {wav}")
+        return
+
+    with STARTUP.phase("create window"):
+        ctk.set_appearance_mode("dark")
+        ctk.set_default_color_theme("blue")
+        root = ctk.CTk()
+    with STARTUP.phase("PhysicsApp"):
+        app = PhysicsApp(root, max_fps=args.fps, profile=args.profile, audio_process=args.audio_process,
+                         polyphony=args.polyphony, steal=args.steal)
+    if args.startup_profile:
+        # Tk goes idle once the window is first drawn
+        root.after_idle(lambda: print(STARTUP.report()))
+    root.mainloop()
 
 
 # Run the application
 if __name__ == "__main__":
-    root = ctk.CTk()
-    app = PhysicsApp(root)
-    root.mainloop()
+    main()
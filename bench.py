@@ -0,0 +1,368 @@
+"""Benchmarks for StemBeats' frame, audio and startup hot paths.
+
+Runs without a display or an audio device: frames are drawn to a
+RasterCanvas, the audio callback is called directly and clips are decoded
+with SDL's dummy driver. Each benchmark reports mean and p99 latency and
+how much memory a call allocates. Results can be saved as a baseline, and
+later runs flag anything that got slower or allocates more.
+
+    python bench.py                  # run everything, compare with the baseline
+    python bench.py --save           # run everything and store it as the baseline
+    python bench.py frame audio      # only benchmarks whose names contain these
+"""
+
+import argparse
+import atexit
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+import numpy as np
+
+# Dummy backends, set before anything loads SDL or PortAudio
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+try:
+    import sounddevice
+except (ImportError, OSError):
+    # No PortAudio here; the benchmarks call the audio callback themselves
+    sys.modules["sounddevice"] = types.ModuleType("sounddevice")
+
+import StemBeats
+
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+
+
+class Benchmark:
+    """A named function to time, with the number of calls to time it over"""
+
+    def __init__(self, name, function, iterations=200, setup=None):
+        self.name = name
+        self.function = function
+        self.iterations = iterations
+        self.setup = setup  # Called untimed before each call, if given
+
+    def run(self, scale=1.0):
+        """Mean and p99 milliseconds per call, and KiB allocated per call"""
+        iterations = max(3, int(self.iterations * scale))
+        self.call()  # Warm up
+
+        times = np.empty(iterations)
+        for i in range(iterations):
+            if self.setup:
+                self.setup()
+            start = time.perf_counter()
+            self.function()
+            times[i] = time.perf_counter() - start
+
+        # Allocations are measured in a separate pass, tracing slows calls down
+        allocated = np.empty(min(iterations, 20))
+        tracemalloc.start()
+        for i in range(len(allocated)):
+            if self.setup:
+                self.setup()
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            self.function()
+            allocated[i] = tracemalloc.get_traced_memory()[1] - before
+        tracemalloc.stop()
+
+        return {
+            "mean": float(times.mean() * 1000),
+            "p99": float(np.percentile(times, 99) * 1000),
+            "alloc": float(allocated.mean() / 1024),
+        }
+
+    def call(self):
+        if self.setup:
+            self.setup()
+        self.function()
+
+
+def frame_benchmarks():
+    """One frame of each visualization, drawn to a headless canvas"""
+    registry = StemBeats.FormulaRegistry()
+    benchmarks = []
+    for visual_id in registry.visuals:
+        visual = registry.visual_class(visual_id)()
+        scene = StemBeats.Scene(StemBeats.RasterCanvas())
+        scene.begin(visual_id)
+        clock = iter(range(10 ** 9))
+
+        def frame(visual=visual, scene=scene, clock=clock):
+            visual.draw(scene, next(clock) / 60)
+
+        benchmarks.append(Benchmark(f"frame/{visual_id}", frame, 500))
+    return benchmarks
+
+
+def audio_benchmarks():
+    """One audio callback block with the sine tone playing at several block sizes, and with a full voice pool"""
+    benchmarks = []
+    for blocksize in (64, 256, 1024):
+        engine = StemBeats.AudioEngine(StemBeats.SAMPLE_RATE, StemBeats.CHANNELS, blocksize)
+        engine.start_tone(440, 0.5)
+        outdata = np.zeros((blocksize, StemBeats.CHANNELS), dtype=np.float32)
+
+        def block(engine=engine, outdata=outdata, blocksize=blocksize):
+            engine.callback(outdata, blocksize, None, None)
+
+        benchmarks.append(Benchmark(f"audio/tone@{blocksize}", block, 2000))
+
+    # A new one-second hit every block keeps a 16-voice pool full and stealing
+    engine = StemBeats.AudioEngine(StemBeats.SAMPLE_RATE, StemBeats.CHANNELS, 256, polyphony=16)
+    hit = np.full((StemBeats.SAMPLE_RATE, StemBeats.CHANNELS), 0.01, dtype=np.float32)
+    outdata = np.zeros((256, StemBeats.CHANNELS), dtype=np.float32)
+
+    def hits():
+        engine.play(hit)
+        engine.callback(outdata, 256, None, None)
+
+    benchmarks.append(Benchmark("audio/voices@256", hits, 2000))
+    return benchmarks
+
+
+def formula_benchmarks(size=10000, symbolic_size=500):
+    """check_formula's two stages against large formula sets"""
+    registry = StemBeats.FormulaRegistry()
+    formulas = dict(registry.formulas)
+    for i in range(size):
+        formulas[f"Q{i} = k{i} * x"] = {"visual": "force", "aliases": [f"Q{i} = x * k{i}"]}
+    index = StemBeats.FormulaIndex(formulas)
+
+    # The symbolic stage parses every formula once; that isn't timed. The
+    # entry matches none of them, so every formula is compared
+    symbolic = dict(list(formulas.items())[:symbolic_size])
+    symbolic.update(registry.formulas)
+    matcher = StemBeats.SymbolicMatcher(symbolic)
+    entry = "E = m c^2"
+    matcher.match(entry)
+
+    return [
+        Benchmark(f"check_formula/index-hit[{len(formulas)}]", lambda: index.lookup(f"Q{size - 1}=x*k{size - 1}"), 2000),
+        Benchmark(f"check_formula/index-miss[{len(formulas)}]", lambda: index.lookup("E = mc^2"), 2000),
+        Benchmark(f"check_formula/symbolic[{len(symbolic)}]", lambda: matcher.match(entry), 20),
+    ]
+
+
+def load_benchmarks():
+    """Loading every formula's sounds, from an empty cache and a warm one"""
+    registry = StemBeats.FormulaRegistry()
+    sound_files = {"correct.mp3"}
+    for info in registry.formulas.values():
+        sound_files.update(filter(None, [info.get("sound")] + info.get("samples", [])))
+
+    directory = tempfile.mkdtemp(prefix="stembeats-bench-")
+    atexit.register(shutil.rmtree, directory, True)
+
+    def load():
+        sounds = {}
+        loader = StemBeats.SampleLoader(StemBeats.SampleCache(directory), sounds)
+        loader.request(*sorted(sound_files))
+        while len(sounds) < len(sound_files):
+            time.sleep(0.0005)
+
+    def empty_cache():
+        shutil.rmtree(directory, ignore_errors=True)
+
+    return [
+        Benchmark(f"load_sounds/cold[{len(sound_files)}]", load, 5, setup=empty_cache),
+        Benchmark(f"load_sounds/warm[{len(sound_files)}]", load, 50),
+    ]
+
+
+def resample_benchmarks():
+    """Pitching the pendulum's piano clip, uncached and from the cache"""
+    cache = StemBeats.SampleCache(tempfile.mkdtemp(prefix="stembeats-bench-"))
+    atexit.register(shutil.rmtree, cache.directory, True)
+    pcm = cache.load("piano_mid.mp3")
+    resampler = StemBeats.Resampler()
+
+    return [
+        Benchmark("resample/piano", lambda: StemBeats.Resampler.resample(pcm, 1.1), 10),
+        Benchmark("resample/cached", lambda: resampler.get("piano_mid.mp3", pcm, 1.1), 2000),
+    ]
+
+
+def loop_timing(blocksize=256):
+    """Beat-loop inter-onset intervals read back from the engine's output.
+
+    Runs a click loop steadily at 150 bpm, and at 100 bpm switched to 150
+    partway through a beat. Returns (case, largest interval error in ms,
+    longest interval in ms) for each; after the switch every interval
+    should be the new beat, and none longer than the old one.
+    """
+    samplerate = StemBeats.SAMPLE_RATE
+    click = np.ones((1, StemBeats.CHANNELS), dtype=np.float32)
+    results = []
+    for case, first, second in (("steady 150 bpm", 150, 150), ("100 -> 150 bpm", 100, 150)):
+        engine = StemBeats.AudioEngine(samplerate, StemBeats.CHANNELS, blocksize)
+        engine.gain = 1.0
+        engine.bpm = first
+        engine.start_loop("click", click)
+        outdata = np.zeros((blocksize, StemBeats.CHANNELS), dtype=np.float32)
+        switch = int(samplerate * 2.9)  # Most of the way through the fifth 100 bpm beat
+        onsets = []
+        for start in range(0, samplerate * 6, blocksize):
+            if start >= switch:
+                engine.bpm = second
+            engine.callback(outdata, blocksize, None, None)
+            onsets.extend(start + np.flatnonzero(outdata[:, 0]))
+
+        intervals = np.diff(onsets)
+        new_beat = samplerate * 60 / second
+        after = intervals[np.searchsorted(onsets, switch):]  # From the first onset after the switch
+        error = np.abs(after - new_beat).max(initial=0)
+        results.append((case, error * 1000 / samplerate, intervals.max() * 1000 / samplerate))
+    return results
+
+
+def restore_burst(blocksize=256, hidden=10.0):
+    """Loudest block after the window comes back from being minimized.
+
+    A fast orbit's hits are scheduled a few frames a second, then no frames
+    run for hidden seconds while the audio carries on, as when the window
+    is minimized, then frames resume. Returns the peak output over the
+    whole run divided by one hit's; hits missed while hidden should be
+    dropped, so it stays 1.
+    """
+    samplerate = StemBeats.SAMPLE_RATE
+    registry = StemBeats.FormulaRegistry()
+    visual = registry.visual_class("orbit")(radius=50, speed=5.0)
+    hit = np.full((samplerate // 10, StemBeats.CHANNELS), 0.1, dtype=np.float32)
+    engine = StemBeats.AudioEngine(samplerate, StemBeats.CHANNELS, blocksize)
+    engine.gain = 1.0
+    sounds = {sound_file: hit for _, sound_file in visual.sound_events(0, 60)}
+    app = types.SimpleNamespace(audio=engine, sounds=sounds, resampler=StemBeats.Resampler())
+    events = StemBeats.EventScheduler(app)
+    events.start(visual)
+
+    outdata = np.zeros((blocksize, StemBeats.CHANNELS), dtype=np.float32)
+    peak = 0.0
+    for block in range(int((hidden + 4) * samplerate / blocksize)):
+        shown = not 2 < block * blocksize / samplerate < 2 + hidden
+        if shown and block % 8 == 0:  # About 20 frames a second
+            events.update()
+        engine.callback(outdata, blocksize, None, None)
+        peak = max(peak, float(np.abs(outdata).max()))
+    return peak / 0.1
+
+
+def voice_pool_fuzz(cases=300, seed=0):
+    """Random clips started and scheduled on small voice pools.
+
+    Each case runs an engine with a polyphony of 1 to 4 for a few blocks,
+    checking every block that the callback doesn't raise, the output stays
+    within what the sounding voices could add up to, and the pool's active
+    count matches its slots. Returns (cases run, the first failure or None).
+    """
+    rng = np.random.default_rng(seed)
+    for case in range(cases):
+        polyphony = int(rng.integers(1, 5))
+        steal = str(rng.choice(["oldest", "quietest"]))
+        blocksize = int(rng.choice([64, 256]))
+        engine = StemBeats.AudioEngine(StemBeats.SAMPLE_RATE, StemBeats.CHANNELS, blocksize,
+                                       polyphony=polyphony, steal=steal)
+        engine.gain = 1.0
+        pool = engine.voices
+        outdata = np.zeros((blocksize, StemBeats.CHANNELS), dtype=np.float32)
+        for block in range(12):
+            for _ in range(rng.integers(0, 4)):
+                pcm = np.ones((int(rng.integers(1, 600)), StemBeats.CHANNELS), dtype=np.float32)
+                if rng.random() < 0.3:
+                    engine.play(pcm)
+                else:
+                    engine.schedule(pcm, engine.frame + int(rng.integers(-blocksize, 3 * blocksize)))
+            try:
+                engine.callback(outdata, blocksize, None, None)
+            except Exception as e:
+                return case + 1, f"polyphony {polyphony}, {steal}, block {block}: {e!r}"
+            sounding = sum(pcm is not None and release is None for pcm, release in zip(pool.pcm, pool.release))
+            if sounding != pool.active or pool.active > polyphony:
+                return case + 1, f"polyphony {polyphony}, {steal}, block {block}: {pool.active} active, {sounding} sounding"
+            if not np.all(np.abs(outdata) <= len(pool.pcm)):
+                return case + 1, f"polyphony {polyphony}, {steal}, block {block}: output out of range"
+    return cases, None
+
+
+def compare(result, baseline, tolerance):
+    """Regressions of result against its baseline entry, as text"""
+    problems = []
+    for key, label in (("mean", "mean"), ("p99", "p99"), ("alloc", "alloc")):
+        if key in baseline and result[key] > baseline[key] * (1 + tolerance) + (1 if key == "alloc" else 0.001):
+            problems.append(f"{label} {result[key] / baseline[key] - 1:+.0%}" if baseline[key] else f"{label} new")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark StemBeats' frame, audio and startup hot paths")
+    parser.add_argument("filter", nargs="*", help="only run benchmarks whose names contain one of these")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline file to compare with or save to")
+    parser.add_argument("--save", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="slowdown flagged as a regression, 0.25 = 25%%")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every benchmark's iteration count")
+    args = parser.parse_args(argv)
+
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        baseline = {}
+
+    benchmarks = (frame_benchmarks() + audio_benchmarks() + formula_benchmarks() + load_benchmarks()
+                  + resample_benchmarks())
+    if args.filter:
+        benchmarks = [b for b in benchmarks if any(word in b.name for word in args.filter)]
+
+    print(f"{'benchmark':36s} {'mean ms':>9s} {'p99 ms':>9s} {'alloc KiB':>10s}  baseline")
+    results = {}
+    regressions = 0
+    for benchmark in benchmarks:
+        result = results[benchmark.name] = benchmark.run(args.scale)
+        if benchmark.name not in baseline:
+            status = "-"
+        else:
+            problems = compare(result, baseline[benchmark.name], args.tolerance)
+            regressions += bool(problems)
+            status = "REGRESSION " + ", ".join(problems) if problems else "ok"
+        print(f"{benchmark.name:36s} {result['mean']:9.3f} {result['p99']:9.3f} {result['alloc']:10.1f}  {status}")
+
+    # Beat-loop timing is checked, not timed: any drift is a regression
+    if not args.filter or any(word in "audio/loop-timing" for word in args.filter):
+        for case, error, longest in loop_timing():
+            problem = error > 0.05 or longest > 600.05  # 600 ms is a 100 bpm beat
+            regressions += problem
+            print(f"{'audio/loop-timing ' + case:36s} {error:9.3f} ms max interval error, "
+                  f"{longest:.1f} ms longest  {'REGRESSION' if problem else 'ok'}")
+
+    # As is the first frame after the window is restored
+    if not args.filter or any(word in "audio/restore-burst" for word in args.filter):
+        peak = restore_burst()
+        problem = peak > 1.01
+        regressions += problem
+        print(f"{'audio/restore-burst':36s} {peak:9.2f} x one hit at the loudest  {'REGRESSION' if problem else 'ok'}")
+
+    # So is the voice pool: any failure in the callback would stop the stream
+    if not args.filter or any(word in "audio/voice-fuzz" for word in args.filter):
+        cases, failure = voice_pool_fuzz()
+        regressions += failure is not None
+        print(f"{'audio/voice-fuzz':36s} {cases} cases  {'REGRESSION ' + failure if failure else 'ok'}")
+
+    if args.save:
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+
+    return 1 if regressions and not args.save else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
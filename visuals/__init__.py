@@ -0,0 +1,5 @@
+"""StemBeats visualizations, one module each.
+
+Modules are named by the renderer entries in formulas.json and are only
+imported once their formula is shown.
+"""
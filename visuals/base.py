@@ -0,0 +1,60 @@
+import math
+
+import numpy as np
+
+
+# Physics shared by the visualizations. Lengths are in the visualizations'
+# units: centimetres, drawn one pixel each
+GRAVITY = 9.8  # m/s²
+
+
+def periodic_times(first, period, start, end):
+    """Times first + k * period, k >= 0, that fall in [start, end)"""
+    k = max(0, math.ceil((start - first) / period))
+    return np.arange(first + k * period, end, period)
+
+
+class Visual:
+    """A visualization with fixed parameters.
+
+    draw puts one frame on a Scene, time_passed seconds from the start.
+    sound_events, tone and pitch describe what it sounds like, from the
+    same physics, so the app and the offline renderer can share them.
+
+    The quantities and hits class methods give the same physics for
+    parameters alone, elementwise when they are NumPy arrays, so whole
+    grids of parameters can be worked out at once.
+    """
+
+    name = None  # Visual id, as in formulas.json
+
+    def draw(self, scene, time_passed):
+        raise NotImplementedError
+
+    @classmethod
+    def quantities(cls, **params):
+        """Quantities derived from params, by name"""
+        return {}
+
+    @classmethod
+    def hits(cls, **params):
+        """(first, period, sound file) of the regular hits params make, or None"""
+        return None
+
+    def sound_events(self, start, end):
+        """List the (time, sound file) hits made between start and end seconds"""
+        return []
+
+    @staticmethod
+    def periodic_events(hits, start, end):
+        """sound_events for hits as returned by the hits class method"""
+        first, period, sound_file = hits
+        return [(t, sound_file) for t in periodic_times(first, period, start, end)]
+
+    def tone(self):
+        """Frequency of a continuous tone to play alongside, or None"""
+        return None
+
+    def pitch(self):
+        """Rate to play the hit clips at, 1 as recorded and 2 an octave up"""
+        return 1.0
@@ -0,0 +1,196 @@
+"""Ohm's law: V = IR"""
+
+from visuals.base import Visual
+
+
+CURRENT_SPEED = 0.4  # Laps of the loop the current indicators make a second
+CIRCUIT_DOTS = [4, 6, 8, 12]  # Current indicators drawn at each detail level
+
+
+class CircuitVisual(Visual):
+    """A battery and resistor, with the current flowing round"""
+
+    name = "circuit"
+
+    def __init__(self, voltage=10.0, resistance=5.0):
+        self.voltage = voltage
+        self.resistance = resistance
+
+    @classmethod
+    def quantities(cls, voltage=10.0, resistance=5.0):
+        return {"current": voltage / resistance}
+
+    def draw(self, scene, time_passed):
+        voltage, resistance = self.voltage, self.resistance
+        time_passed *= CURRENT_SPEED
+
+        # Draw title
+        scene.text("title",
+            300, 30,
+            text="Ohm's Law: V = IR",
+            fill="#e2e2e2",
+            font=("Roboto", 16, "bold")
+        )
+
+        # Calculate current (I = V/R)
+        current = voltage / resistance
+
+        # Draw battery
+        battery_x, battery_y = 150, 250
+        battery_width, battery_height = 40, 80
+
+        # Battery body
+        scene.rectangle("battery",
+            battery_x - battery_width / 2, battery_y - battery_height / 2,
+            battery_x + battery_width / 2, battery_y + battery_height / 2,
+            fill="#3498db"
+        )
+
+        # Battery terminals
+        scene.line("terminal_pos",
+            battery_x, battery_y - battery_height / 2 - 10,
+            battery_x, battery_y - battery_height / 2,
+            fill="white", width=3
+        )
+        scene.line("terminal_neg",
+            battery_x - 10, battery_y + battery_height / 2,
+            battery_x + 10, battery_y + battery_height / 2,
+            fill="white", width=3
+        )
+
+        # Battery voltage label
+        scene.text("voltage_label",
+            battery_x, battery_y,
+            text=f"{voltage}V",
+            fill="white",
+            font=("Roboto", 12, "bold")
+        )
+
+        # Draw resistor
+        resistor_x, resistor_y = 300, 150
+        resistor_width, resistor_height = 60, 30
+
+        scene.rectangle("resistor",
+            resistor_x - resistor_width / 2, resistor_y - resistor_height / 2,
+            resistor_x + resistor_width / 2, resistor_y + resistor_height / 2,
+            fill="#9b59b6"
+        )
+
+        # Resistor value label
+        scene.text("resistance_label",
+            resistor_x, resistor_y,
+            text=f"{resistance}Ω",
+            fill="white",
+            font=("Roboto", 12, "bold")
+        )
+
+        # Draw bulb/lamp
+        lamp_x, lamp_y = 450, 250
+        lamp_radius = 30
+
+        # Bulb brightness based on current (higher current = brighter)
+        brightness = min(255, int(current * 25))
+        lamp_color = f"#{brightness:02x}{brightness:02x}{brightness:02x}"
+
+        # Bulb body
+        scene.oval("lamp",
+            lamp_x - lamp_radius, lamp_y - lamp_radius,
+            lamp_x + lamp_radius, lamp_y + lamp_radius,
+            fill=lamp_color, outline="white"
+        )
+
+        # Bulb filament
+        scene.line("filament",
+            lamp_x - lamp_radius / 2, lamp_y,
+            lamp_x + lamp_radius / 2, lamp_y,
+            fill="yellow" if brightness > 100 else "gray",
+            width=2
+        )
+
+        # Draw wires
+        # Top wire
+        scene.line("top_wire",
+            battery_x, battery_y - battery_height / 2,
+            battery_x, resistor_y,
+                       resistor_x - resistor_width / 2, resistor_y,
+            fill="#e2e2e2", width=2
+        )
+
+        # Middle wire
+        scene.line("middle_wire",
+            resistor_x + resistor_width / 2, resistor_y,
+            lamp_x, resistor_y,
+            lamp_x, lamp_y - lamp_radius,
+            fill="#e2e2e2", width=2
+        )
+
+        # Bottom wire
+        scene.line("bottom_wire",
+            lamp_x, lamp_y + lamp_radius,
+            lamp_x, lamp_y + lamp_radius + 20,
+            battery_x, lamp_y + lamp_radius + 20,
+            battery_x, battery_y + battery_height / 2,
+            fill="#e2e2e2", width=2
+        )
+
+        # Draw current flow indicators (animated dots), fewer at lower detail
+        num_dots = CIRCUIT_DOTS[scene.detail]
+        for i in range(num_dots, CIRCUIT_DOTS[-1]):
+            scene.delete(("dot", i))
+        for i in range(num_dots):
+            # Calculate position in the circuit cycle
+            circuit_position = (time_passed + i / num_dots) % 1.0
+
+            # Determine dot position based on circuit position
+            dot_x, dot_y = 0, 0
+
+            if circuit_position < 0.25:  # Top wire
+                progress = circuit_position * 4
+                dot_x = battery_x + progress * (resistor_x - resistor_width / 2 - battery_x)
+                dot_y = resistor_y
+            elif circuit_position < 0.5:  # Middle wire
+                progress = (circuit_position - 0.25) * 4
+                dot_x = resistor_x + resistor_width / 2 + progress * (lamp_x - (resistor_x + resistor_width / 2))
+                dot_y = resistor_y
+            elif circuit_position < 0.75:  # Bottom wire (vertical part near lamp)
+                progress = (circuit_position - 0.5) * 4
+                dot_x = lamp_x
+                dot_y = lamp_y + lamp_radius + progress * 20
+            else:  # Bottom wire (horizontal and back to battery)
+                progress = (circuit_position - 0.75) * 4
+                dot_x = lamp_x - progress * (lamp_x - battery_x)
+                dot_y = lamp_y + lamp_radius + 20
+
+            # Draw dot with brightness proportional to current
+            dot_size = 3 + current / 3
+            dot_color = f"#{min(255, int(current * 25)):02x}ff{min(255, int(current * 25)):02x}"
+
+            scene.oval(("dot", i),
+                dot_x - dot_size, dot_y - dot_size,
+                dot_x + dot_size, dot_y + dot_size,
+                fill=dot_color, outline=""
+            )
+
+        # Draw physics info
+        scene.text("physics_info",
+            300, 420,
+            text=f"Voltage: {voltage:.1f} V | Resistance: {resistance:.1f} Ω | Current: {current:.2f} A",
+            fill="#e2e2e2",
+            font=("Roboto", 12)
+        )
+
+        # Draw audio info
+        scene.text("audio_info",
+            300, 450,
+            text="No sound for this visualization",
+            fill="#9b59b6",
+            font=("Roboto", 12)
+        )
+
+        # Controls
+        scene.text("controls",
+            300, 480,
+            text="Click to change voltage and resistance",
+            fill="#9b59b6",
+            font=("Roboto", 12)
+        )
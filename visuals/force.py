@@ -0,0 +1,101 @@
+"""Newton's second law: F = ma"""
+
+import tkinter as tk
+
+from visuals.base import Visual
+
+
+class ForceVisual(Visual):
+    """A block pushed by a constant force"""
+
+    name = "force"
+
+    def __init__(self, mass=2.0, force=10.0):
+        self.mass = mass
+        self.force = force
+
+    @classmethod
+    def quantities(cls, mass=2.0, force=10.0):
+        return {"acceleration": force / mass}
+
+    def draw(self, scene, time_passed):
+        mass, force = self.mass, self.force
+
+        # Draw title
+        scene.text("title",
+            300, 30,
+            text="Newton's Second Law: F = ma",
+            fill="#e2e2e2",
+            font=("Roboto", 16, "bold")
+        )
+
+        # Calculate acceleration (a = F/m)
+        acceleration = force / mass
+
+        # Calculate cycle time - time until reset
+        cycle_time = 6.0  # seconds
+        cycle_position = time_passed % cycle_time
+
+        # Check if we're in reset phase
+        reset_phase = cycle_position > 5.0
+
+        # Calculate position
+        if not reset_phase:
+            # Normal motion: x = x₀ + 0.5at²
+            distance = 0.5 * acceleration * (cycle_position ** 2)
+            pos_x = 100 + min(distance * 10, 400)  # Scale and limit to canvas
+        else:
+            # Reset animation
+            reset_progress = (cycle_position - 5.0)
+            pos_x = max(100, 500 - reset_progress * 800)
+
+        # Draw ground
+        scene.line("ground", 100, 350, 500, 350, fill="#2ecc71", width=3)
+
+        # Draw object
+        size = 30 + mass * 10  # Size based on mass
+        scene.rectangle("block",
+            pos_x - size / 2, 350 - size,
+            pos_x + size / 2, 350,
+            fill="#3498db"
+        )
+
+        # Draw force arrow
+        arrow_length = force * 5
+        scene.line("arrow",
+            pos_x, 350 - size / 2,
+                   pos_x + arrow_length, 350 - size / 2,
+            fill="#e74c3c", width=3, arrow=tk.LAST
+        )
+
+        # Draw physics info
+        scene.text("physics_info",
+            300, 400,
+            text=f"Mass: {mass} kg | Force: {force} N | Acceleration: {acceleration:.2f} m/s²",
+            fill="#e2e2e2",
+            font=("Roboto", 12)
+        )
+
+        # Draw time and distance
+        if not reset_phase:
+            scene.text("time_info",
+                300, 430,
+                text=f"Time: {cycle_position:.2f} s | Distance: {distance:.2f} m",
+                fill="#e2e2e2",
+                font=("Roboto", 12)
+            )
+        else:
+            scene.text("time_info",
+                300, 430,
+                text="Resetting position...",
+                fill="#e2e2e2",
+                font=("Roboto", 12)
+            )
+
+        # Controls
+        scene.text("controls",
+            300, 470,
+            text="Click to change force and mass",
+            fill="#9b59b6",
+            font=("Roboto", 12)
+        )
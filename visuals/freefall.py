@@ -0,0 +1,115 @@
+"""Free fall: t = √(2h/g)"""
+
+import numpy as np
+
+from visuals.base import GRAVITY, Visual
+
+
+FREEFALL_RESET = 0.5  # Pause before the free fall restarts, seconds
+
+
+def fall_time(height):
+    """Time in seconds to fall height cm from rest"""
+    return np.sqrt(2 * (height / 100) / GRAVITY)
+
+
+class FreefallVisual(Visual):
+    """A ball dropped from height cm, over and over"""
+
+    name = "freefall"
+
+    def __init__(self, height=400):
+        self.height = height
+
+    @classmethod
+    def quantities(cls, height=400):
+        total_time = fall_time(height)
+        return {"fall_time": total_time, "impact_speed": GRAVITY * total_time}
+
+    @classmethod
+    def hits(cls, height=400):
+        # Ground impacts, once per drop and reset cycle
+        total_time = fall_time(height)
+        return total_time, total_time + FREEFALL_RESET, "drum.mp3"
+
+    def sound_events(self, start, end):
+        return self.periodic_events(self.hits(self.height), start, end)
+
+    def draw(self, scene, time_passed):
+        height = self.height
+
+        # Draw title
+        scene.text("title",
+            300, 30,
+            text="Free Fall Time: t = √(2h/g)",
+            fill="#e2e2e2",
+            font=("Roboto", 16, "bold")
+        )
+
+        # Constants
+        g = GRAVITY
+
+        # Calculate total fall time
+        total_time = fall_time(height)
+
+        # Calculate cycle time (drop + reset)
+        cycle_time = total_time + FREEFALL_RESET
+
+        # Calculate current time in the cycle
+        cycle_position = time_passed % cycle_time
+
+        # Determine if in falling phase or reset phase
+        in_falling_phase = cycle_position <= total_time
+
+        # Calculate current position
+        initial_y = 80
+        max_y = initial_y + height
+
+        if in_falling_phase:
+            # Normal falling physics: y = y₀ + 0.5gt²
+            current_y = initial_y + 0.5 * g * (cycle_position ** 2) * 100
+            if current_y > max_y:
+                current_y = max_y
+        else:
+            current_y = initial_y
+
+        # Draw building/reference
+        scene.rectangle("building", 160, initial_y, 440, max_y, outline="#3498db")
+
+        # Draw ground
+        scene.line("ground", 100, max_y, 500, max_y, fill="#2ecc71", width=3)
+
+        # Draw ball
+        scene.oval("ball", 290 - 10, current_y - 10, 290 + 10, current_y + 10, fill="#e74c3c")
+
+        # Draw time info
+        scene.text("time_info",
+            300, 500,
+            text=f"Fall time: {total_time:.2f} seconds | Current cycle: {cycle_position:.2f}/{cycle_time:.2f} seconds",
+            fill="#e2e2e2",
+            font=("Roboto", 12)
+        )
+
+        # Draw height info
+        scene.text("height_info",
+            300, 520,
+            text=f"Height: {height / 100:.2f} meters",
+            fill="#e2e2e2",
+            font=("Roboto", 12)
+        )
+
+        # Draw audio info
+        scene.text("audio_info",
+            300, 540,
+            text="Sound: Drum when object hits ground",
+            fill="#9b59b6",
+            font=("Roboto", 12)
+        )
+
+        # Controls
+        scene.text("controls",
+            300, 570,
+            text="Click to change drop height",
+            fill="#9b59b6",
+            font=("Roboto", 12)
+        )
@@ -0,0 +1,124 @@
+"""Centripetal force: F = mv²/r"""
+
+import math
+import tkinter as tk
+
+from visuals.base import Visual
+
+
+ORBIT_MASS = 1.0  # kg
+
+
+def orbit_period(radius, speed):
+    """Period of an orbit radius cm across at the given speed factor"""
+    velocity = 50 * speed
+    return 2 * math.pi * radius / velocity
+
+
+class OrbitVisual(Visual):
+    """A body in circular orbit, with its velocity and the force on it"""
+
+    name = "orbit"
+
+    def __init__(self, radius=150, speed=1.0):
+        self.radius = radius
+        self.speed = speed
+
+    @classmethod
+    def quantities(cls, radius=150, speed=1.0):
+        velocity = 50 * speed
+        return {"velocity": velocity, "period": orbit_period(radius, speed),
+                "centripetal_force": ORBIT_MASS * velocity ** 2 / radius}
+
+    @classmethod
+    def hits(cls, radius=150, speed=1.0):
+        # Every eighth of a revolution, starting straight away
+        period = orbit_period(radius, speed)
+        return 0 * period, period / 8, "snare.mp3"
+
+    def sound_events(self, start, end):
+        return self.periodic_events(self.hits(self.radius, self.speed), start, end)
+
+    def draw(self, scene, time_passed):
+        radius, speed = self.radius, self.speed
+
+        # Draw title
+        scene.text("title",
+            300, 30,
+            text="Centripetal Force: F = mv²/r",
+            fill="#e2e2e2",
+            font=("Roboto", 16, "bold")
+        )
+
+        # Constants
+        center_x, center_y = 300, 250
+        mass = ORBIT_MASS
+
+        # Calculate period of orbit (T = 2πr/v)
+        velocity = 50 * speed  # pixels per second
+        period = orbit_period(radius, speed)
+
+        # Calculate current angle
+        angle = (time_passed % period) / period * 2 * math.pi
+
+        # Calculate object position
+        obj_x = center_x + radius * math.cos(angle)
+        obj_y = center_y + radius * math.sin(angle)
+
+        # Draw central object (sun/planet)
+        scene.oval("sun", center_x - 20, center_y - 20, center_x + 20, center_y + 20, fill="#f1c40f")
+
+        # Draw orbit path
+        scene.oval("path",
+            center_x - radius, center_y - radius,
+            center_x + radius, center_y + radius,
+            outline="#3498db", dash=(2, 4)
+        )
+
+        # Draw orbiting object
+        scene.oval("planet", obj_x - 10, obj_y - 10, obj_x + 10, obj_y + 10, fill="#3498db")
+
+        # Calculate centripetal force (F = mv²/r)
+        force = mass * (velocity ** 2) / radius
+
+        # Draw force vector (pointing to center)
+        vector_length = min(30, force)
+        vector_angle = math.atan2(center_y - obj_y, center_x - obj_x)
+        vector_end_x = obj_x + vector_length * math.cos(vector_angle)
+        vector_end_y = obj_y + vector_length * math.sin(vector_angle)
+
+        scene.line("vector",
+            obj_x, obj_y, vector_end_x, vector_end_y,
+            fill="#e74c3c", width=2, arrow=tk.LAST
+        )
+
+        # Draw physics info
+        scene.text("physics_info",
+            300, 420,
+            text=f"Mass: {mass} kg | Velocity: {velocity:.1f} m/s | Radius: {radius / 100:.1f} m",
+            fill="#e2e2e2",
+            font=("Roboto", 12)
+        )
+
+        scene.text("force_info",
+            300, 450,
+            text=f"Centripetal Force: {force:.2f} N | Period: {period:.2f} seconds",
+            fill="#e2e2e2",
+            font=("Roboto", 12)
+        )
+
+        # Draw audio info
+        scene.text("audio_info",
+            300, 480,
+            text="Sound: Snare beat on each orbit completion",
+            fill="#9b59b6",
+            font=("Roboto", 12)
+        )
+
+        # Controls
+        scene.text("controls",
+            300, 510,
+            text="Click to change orbit radius and speed",
+            fill="#9b59b6",
+            font=("Roboto", 12)
+        )
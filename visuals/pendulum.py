@@ -0,0 +1,111 @@
+"""Simple pendulum: T = 2π√(L/g)"""
+
+import math
+
+import numpy as np
+
+from visuals.base import GRAVITY, Visual
+
+
+def pendulum_period(length):
+    """Period in seconds of a pendulum length cm long"""
+    return 2 * math.pi * np.sqrt(length / 100 / GRAVITY)
+
+
+# The piano clip sounds as recorded for a pendulum this many cm long, and
+# is pitched by 1/T from there, so longer pendulums sound lower
+PIANO_LENGTH = 200
+
+
+def piano_pitch(length):
+    """Rate to play the piano clip at for a pendulum length cm long"""
+    return pendulum_period(PIANO_LENGTH) / pendulum_period(length)
+
+
+class PendulumVisual(Visual):
+    """A pendulum swinging with the period its length gives it"""
+
+    name = "pendulum"
+
+    def __init__(self, angle=30, length=200):
+        self.angle = angle
+        self.length = length
+
+    @classmethod
+    def quantities(cls, angle=30, length=200):
+        return {"period": pendulum_period(length), "pitch": piano_pitch(length)}
+
+    @classmethod
+    def hits(cls, angle=30, length=200):
+        # Swing extremes, a quarter period in and every half period after
+        period = pendulum_period(length)
+        return period / 4, period / 2, "piano_mid.mp3"
+
+    def sound_events(self, start, end):
+        return self.periodic_events(self.hits(length=self.length), start, end)
+
+    def pitch(self):
+        return float(piano_pitch(self.length))
+
+    def draw(self, scene, time_passed):
+        angle, length = self.angle, self.length
+
+        # Draw title
+        scene.text("title",
+            300, 30,
+            text="Pendulum Period: T = 2π√(L/g)",
+            fill="#e2e2e2",
+            font=("Roboto", 16, "bold")
+        )
+
+        # Calculate period
+        period = pendulum_period(length)
+
+        # Calculate current angle
+        amplitude = math.radians(angle)
+        omega = 2 * math.pi / period
+        current_angle = amplitude * math.sin(omega * time_passed)
+
+        # Calculate pendulum position
+        origin_x, origin_y = 300, 100
+        bob_x = origin_x + length * math.sin(current_angle)
+        bob_y = origin_y + length * math.cos(current_angle)
+
+        # Draw pendulum
+        scene.line("rod", origin_x, origin_y, bob_x, bob_y, fill="#9b59b6", width=3)
+        scene.oval("bob", bob_x - 15, bob_y - 15, bob_x + 15, bob_y + 15, fill="#e74c3c")
+
+        # Draw mount
+        scene.rectangle("mount", origin_x - 20, origin_y - 5, origin_x + 20, origin_y + 5, fill="#3498db")
+
+        # Draw time info
+        scene.text("time_info",
+            300, 450,
+            text=f"Period: {period:.2f} seconds | Time: {time_passed:.2f} seconds",
+            fill="#e2e2e2",
+            font=("Roboto", 12)
+        )
+
+        # Draw length info
+        scene.text("length_info",
+            300, 470,
+            text=f"Length: {length / 100:.2f} meters",
+            fill="#e2e2e2",
+            font=("Roboto", 12)
+        )
+
+        # Draw audio info
+        scene.text("audio_info",
+            300, 490,
+            text="Sound: Piano at extremes, background tone based on period",
+            fill="#9b59b6",
+            font=("Roboto", 12)
+        )
+
+        # Controls
+        scene.text("controls",
+            300, 520,
+            text="Click to change pendulum length",
+            fill="#9b59b6",
+            font=("Roboto", 12)
+        )
@@ -0,0 +1,165 @@
+"""Simple harmonic motion: y = A sin(ωt + φ)"""
+
+import math
+
+import numpy as np
+
+from visuals.base import Visual
+
+
+WAVE_TONE_SCALE = 300  # The wave's tone sounds this many times its frequency
+WAVE_LEFT = 100  # Canvas x of the wave's origin
+WAVE_WIDTH = 500  # Pixels of wave drawn
+AXIS_Y = 250
+
+# What each detail level draws, least first: pixels between the wave's
+# points, whether the line is smoothed and how many stippled polygons fill
+# the gradient under it
+WAVE_DETAIL = [
+    (10, False, 0),
+    (5, False, 10),
+    (2, True, 20),
+    (1, True, 20),
+]
+
+
+class WaveVisual(Visual):
+    """A travelling sine wave, with a tone at a multiple of its frequency"""
+
+    name = "wave"
+
+    def __init__(self, amplitude=50, frequency=1.0):
+        self.amplitude = amplitude
+        self.frequency = frequency
+        self.angular_frequency = frequency * 2 * math.pi  # ω = 2πf
+        self.shape = None  # Detail the buffers below are laid out for
+        self.segments = []
+
+    def layout(self, step, num_segments, width):
+        """Lay out the buffers for points step px apart over width px.
+
+        The wave's shape only shifts in phase from frame to frame, so the x
+        positions and each point's angle at t = 0 are worked out here once
+        and every frame is a few NumPy operations on the same buffers.
+        """
+        x = np.arange(0, width + 1, step)
+        self.angles = self.angular_frequency * x / 100
+        self.heights = np.empty(len(x))
+
+        # Flat x, y pairs for the wave line
+        self.points = np.empty((len(x), 2))
+        self.points[:, 0] = x + WAVE_LEFT
+
+        # Each fill segment is the strip under a run of points, drawn down
+        # to the axis and back as x, y, x, axis_y, in a blue to purple
+        # gradient along the wave
+        bounds = np.linspace(0, len(x) - 1, num_segments + 1).astype(int)
+        self.segments = []
+        for i in range(num_segments):
+            lo, hi = bounds[i], bounds[i + 1] + 1
+            segment = np.empty((hi - lo, 4))
+            segment[:, 0] = segment[:, 2] = x[lo:hi] + WAVE_LEFT
+            segment[:, 3] = AXIS_Y
+            color = f"#{int(100 + i / num_segments * 155):02x}{int(100 - i / num_segments * 100):02x}ff"
+            self.segments.append((lo, hi, segment, color))
+
+    @classmethod
+    def quantities(cls, amplitude=50, frequency=1.0):
+        # The tone is scaled up into the audible range
+        return {"period": 1 / frequency, "angular_frequency": frequency * 2 * math.pi,
+                "tone": np.trunc(frequency * WAVE_TONE_SCALE)}
+
+    def tone(self):
+        return int(self.quantities(frequency=self.frequency)["tone"])
+
+    def draw(self, scene, time_passed):
+        amplitude, frequency = self.amplitude, self.frequency
+
+        # Draw title
+        scene.text("title",
+            300, 30,
+            text="Simple Harmonic Motion: y = A sin(ωt + φ)",
+            fill="#e2e2e2",
+            font=("Roboto", 16, "bold")
+        )
+
+        # Parameters
+        angular_frequency = frequency * 2 * math.pi  # ω = 2πf
+        phase = 0  # φ
+
+        # Draw axes
+        axis_y = AXIS_Y
+        scene.line("x_axis", 50, axis_y, 550, axis_y, fill="#3498db", width=1)  # x-axis
+        scene.line("y_axis", 100, 100, 100, 400, fill="#3498db", width=1)  # y-axis
+
+        # Fewer points and fill polygons at lower detail, and only as much
+        # of the wave as the canvas shows
+        step, smooth, num_segments = WAVE_DETAIL[scene.detail]
+        width = WAVE_WIDTH if scene.width is None else min(WAVE_WIDTH, max(scene.width - WAVE_LEFT, 2 * step))
+        if self.shape != (step, num_segments, width):
+            for i in range(num_segments, WAVE_DETAIL[-1][2]):
+                scene.delete(("segment", i))
+            self.layout(step, num_segments, width)
+            self.shape = (step, num_segments, width)
+
+        # Heights across the wave at this instant
+        np.add(self.angles, angular_frequency * time_passed + phase, out=self.heights)
+        np.sin(self.heights, out=self.heights)
+        self.heights *= -amplitude
+        self.heights += axis_y
+
+        # Draw sine wave
+        self.points[:, 1] = self.heights
+        scene.line("wave", self.points.ravel().tolist(), fill="#9b59b6", width=2, smooth=smooth)
+
+        # Create gradient for the wave
+        for i, (lo, hi, segment, color) in enumerate(self.segments):
+            segment[:, 1] = self.heights[lo:hi]
+            scene.polygon(("segment", i), segment.ravel().tolist(), fill=color, outline="", stipple="gray12")
+
+        # Draw a moving point on the wave
+        point_x = 100  # At the origin of the wave
+        point_y = axis_y - amplitude * math.sin(angular_frequency * time_passed + phase)
+        scene.oval("point",
+            point_x - 8, point_y - 8,
+            point_x + 8, point_y + 8,
+            fill="#e74c3c", outline="white"
+        )
+
+        # Draw vertical line to show oscillation
+        scene.line("oscillation",
+            point_x, axis_y,
+            point_x, point_y,
+            fill="white", dash=(2, 2)
+        )
+
+        # Draw parameters
+        scene.text("param_info",
+            300, 420,
+            text=f"Amplitude (A): {amplitude} pixels | Frequency (f): {frequency:.2f} Hz | Angular Frequency (ω): {angular_frequency:.2f} rad/s",
+            fill="#e2e2e2",
+            font=("Roboto", 12)
+        )
+
+        scene.text("period_info",
+            300, 450,
+            text=f"Period (T): {1 / frequency:.2f} seconds | Time: {time_passed:.2f} seconds",
+            fill="#e2e2e2",
+            font=("Roboto", 12)
+        )
+
+        # Draw audio info
+        scene.text("audio_info",
+            300, 480,
+            text="Sound: Synth tones matching wave frequency (freq increased 300x)",
+            fill="#9b59b6",
+            font=("Roboto", 12)
+        )
+
+        # Controls
+        scene.text("controls",
+            300, 510,
+            text="Click to change amplitude and frequency",
+            fill="#9b59b6",
+            font=("Roboto", 12)
+        )